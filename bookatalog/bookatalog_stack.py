@@ -5,7 +5,9 @@ from aws_cdk import (
     CfnOutput,
     RemovalPolicy,
     aws_lambda as _lambda,
+    aws_lambda_event_sources as lambda_event_sources,
     aws_s3 as s3,
+    aws_sqs as sqs,
     aws_iam as iam,
     custom_resources as cr,
 )
@@ -47,6 +49,20 @@ class BookatalogStack(Stack):
                     id="DeleteOldVersions",
                     enabled=True,
                     noncurrent_version_expiration=Duration.days(30)
+                ),
+                # Telegram stops redelivering an update after a day
+                s3.LifecycleRule(
+                    id="ExpireUpdateMarkers",
+                    enabled=True,
+                    prefix="catalog/updates/",
+                    expiration=Duration.days(2)
+                ),
+                # Album members left behind by an interrupted batch, and ingest claims
+                s3.LifecycleRule(
+                    id="ExpireMediaGroupMembers",
+                    enabled=True,
+                    prefix="catalog/groups/",
+                    expiration=Duration.days(2)
                 )
             ],
             removal_policy=RemovalPolicy.DESTROY,
@@ -64,6 +80,34 @@ class BookatalogStack(Stack):
             )
         )
 
+        # catalog/ holds internal state (manifest, hash index, parked album
+        # members); keep it readable only from within this account
+        files_bucket.add_to_resource_policy(
+            iam.PolicyStatement(
+                sid="DenyPublicCatalogRead",
+                effect=iam.Effect.DENY,
+                principals=[iam.AnyPrincipal()],
+                actions=["s3:GetObject"],
+                resources=[f"{files_bucket.bucket_arn}/catalog/*"],
+                conditions={"StringNotEquals": {"aws:PrincipalAccount": self.account}}
+            )
+        )
+
+        # Queue of Telegram updates: the webhook enqueues, the same function consumes
+        ingest_dead_letter_queue = sqs.Queue(
+            self, "IngestDeadLetterQueue",
+            retention_period=Duration.days(14)
+        )
+        ingest_queue = sqs.Queue(
+            self, "IngestQueue",
+            # Must exceed the function timeout
+            visibility_timeout=Duration.seconds(180),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=3,
+                queue=ingest_dead_letter_queue
+            )
+        )
+
         # Lambda function for the bot
         bot_function = _lambda.Function(
             self, "BotFunction",
@@ -76,10 +120,31 @@ class BookatalogStack(Stack):
             memory_size=256,
             environment={
                 "BOT_TOKEN": bot_token.value_as_string,
-                "BUCKET_NAME": files_bucket.bucket_name
+                "BUCKET_NAME": files_bucket.bucket_name,
+                # "dated" or "recent" (newest-first keys), e.g. cdk deploy -c key_layout=recent
+                "KEY_LAYOUT": self.node.try_get_context("key_layout") or "dated",
+                "INGEST_QUEUE_URL": ingest_queue.queue_url,
+                # "true" to ship only the first screen of rows and load the rest while scrolling
+                "LAZY_LISTING": self.node.try_get_context("lazy_listing") or "false",
+                # Public HTTPS endpoint serving the shared stylesheet to the dynamic listing
+                "ASSET_BASE_URL": f"https://{files_bucket.bucket_regional_domain_name}",
+                # Self-hosted Bot API server, e.g. -c telegram_api_url=https://bot-api.example.com
+                "TELEGRAM_API_URL": self.node.try_get_context("telegram_api_url") or "https://api.telegram.org",
+                # "true" when that server runs with --local and its files are mounted into the function
+                "TELEGRAM_LOCAL_MODE": self.node.try_get_context("telegram_local_mode") or "false"
             }
         )
 
+        # The webhook enqueues updates and returns; queued updates are processed one per invocation
+        ingest_queue.grant_send_messages(bot_function)
+        bot_function.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                ingest_queue,
+                batch_size=1,
+                report_batch_item_failures=True
+            )
+        )
+
         # Grant S3 permissions to Lambda
         files_bucket.grant_read_write(bot_function)
 
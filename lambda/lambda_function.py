@@ -1,11 +1,30 @@
+import base64
+import gzip
 import json
+import hashlib
+import heapq
 import boto3
 import os
 import requests
 import logging
+import random
+import re
+import string
+import time
+import unicodedata
 import urllib.parse
-from datetime import datetime
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from datetime import datetime, timezone
 from botocore.exceptions import ClientError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # Optional: adds Content-Encoding: br to Function URL responses
+except ImportError:
+    brotli = None
 
 # Configure logging
 logger = logging.getLogger()
@@ -19,11 +38,214 @@ AWS_REGION = os.environ.get('AWS_REGION', 'eu-west-3')  # AWS Lambda automatical
 # Initialize AWS clients with explicit region
 s3_client = boto3.client('s3', region_name=AWS_REGION, endpoint_url='https://s3.' + AWS_REGION + '.amazonaws.com')
 
+# Queue for ingestion jobs. With a queue configured the webhook only enqueues
+# the update and an SQS-triggered invocation does the downloads; without one
+# jobs run inline in the webhook invocation
+INGEST_QUEUE_URL = os.environ.get('INGEST_QUEUE_URL', '')
+
+# Telegram Bot API client: one pooled keep-alive session per container, so warm
+# invocations reuse TCP+TLS connections to the Bot API
+TELEGRAM_API_BASE = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+# A self-hosted Bot API server started with --local returns absolute paths from
+# getFile; when that path is visible here (shared volume) the file is read from
+# disk instead of downloaded, and the cloud 20 MB download limit doesn't apply
+TELEGRAM_LOCAL_MODE = os.environ.get('TELEGRAM_LOCAL_MODE', '').lower() in ('1', 'true', 'yes')
+TELEGRAM_POOL_SIZE = int(os.environ.get('TELEGRAM_POOL_SIZE', '10'))
+TELEGRAM_MAX_RETRIES = int(os.environ.get('TELEGRAM_MAX_RETRIES', '3'))
+
+def create_telegram_session():
+    """Create the pooled HTTP session used for all Bot API calls.
+    
+    Connection errors are retried for every request; 429/5xx responses only
+    for GETs, so a retried sendMessage can't post the same message twice.
+    """
+    retry = Retry(
+        total=TELEGRAM_MAX_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=False,  # Telegram may ask for longer than the Lambda timeout
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=TELEGRAM_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount(TELEGRAM_API_BASE, adapter)
+    return session
+
+telegram_session = create_telegram_session()
+
+# Catalog manifest: newest-first list of stored files, kept up to date on upload
+# so that listings need a single GET instead of a LIST over files/
+CATALOG_MANIFEST_KEY = 'catalog/manifest.json'
+# Every conflicting round lets at least one writer through, so the last of N
+# concurrent writers may need N attempts. Retries are bounded by time rather
+# than count, well under the function timeout, so that a writer that gives up
+# still has time to drop the manifest for a rebuild
+MANIFEST_UPDATE_SECONDS = float(os.environ.get('MANIFEST_UPDATE_SECONDS', '10'))
+MANIFEST_RETRY_MAX_DELAY = 0.25
+# Time kept back from the invocation for the fallback, publishing and replying
+INVOCATION_RESERVE_SECONDS = 5
+
+# Seconds to wait after an upload before publishing index.html, so that a burst
+# of uploads across concurrent invocations results in a single publish
+INDEX_DEBOUNCE_SECONDS = float(os.environ.get('INDEX_DEBOUNCE_SECONDS', '2'))
+
+# Largest file accepted from Telegram or from a URL
+MAX_FILE_SIZE = 20 * 1024 * 1024
+# The local Bot API server hands out files of up to 2000 MB
+TELEGRAM_MAX_FILE_SIZE = 2000 * 1024 * 1024 if TELEGRAM_LOCAL_MODE else MAX_FILE_SIZE
+
+# Files are streamed into S3 in parts of this size, so peak memory per upload is
+# bounded by the part size rather than the file size (S3 minimum is 5 MiB)
+UPLOAD_PART_SIZE = int(os.environ.get('UPLOAD_PART_SIZE', str(8 * 1024 * 1024)))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Number of URLs from one message downloaded concurrently
+URL_DOWNLOAD_WORKERS = int(os.environ.get('URL_DOWNLOAD_WORKERS', '4'))
+# Large downloads from servers that accept byte ranges are fetched as
+# UPLOAD_PART_SIZE ranges over this many parallel connections
+RANGED_DOWNLOAD_WORKERS = int(os.environ.get('RANGED_DOWNLOAD_WORKERS', '4'))
+URL_PATTERN = re.compile(r'https?://[^\s<>"]+')
+
+# Key layout for stored files: 'dated' (files/YYYY/MM/DD/<name>) or 'recent'
+# (files/recent/<inverted timestamp>/<name>), which lists newest-first so the
+# newest N files are a single list_objects_v2 call with MaxKeys=N
+KEY_LAYOUT = os.environ.get('KEY_LAYOUT', 'dated')
+RECENT_PREFIX = 'files/recent/'
+RECENT_KEY_MAX = 10 ** 13 - 1  # Inverted epoch milliseconds keep 13 digits until 2286
+
+# Presigned links are valid for an hour; the listing ETag changes every half hour
+# so a page revalidated with If-None-Match never serves links about to expire
+PRESIGNED_URL_EXPIRY = 3600
+LISTING_ETAG_WINDOW = 1800
+
+# Warm-container cache for listings and rendered pages
+LISTING_CACHE_TTL = float(os.environ.get('LISTING_CACHE_TTL', '15'))
+LISTING_CACHE_SIZE = int(os.environ.get('LISTING_CACHE_SIZE', '32'))
+
+# Page size limits for the JSON catalog API
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+
+# Content hash index: catalog/sha256/<hex> holds the key of the stored copy
+CONTENT_HASH_PREFIX = 'catalog/sha256/'
+# A marker is written before its object is stored; while the object is missing
+# and the claim is this recent, the content counts as being uploaded
+CONTENT_HASH_PENDING_SECONDS = 300
+
+# Markers of Telegram updates already accepted, so redeliveries are ignored
+UPDATE_MARKER_PREFIX = 'catalog/updates/'
+PROCESSED_UPDATES_CACHE_SIZE = 1000
+processed_updates = OrderedDict()
+
+# time.monotonic() by which the current ingest invocation must finish retrying
+# (set from the Lambda context; None outside of an SQS invocation)
+invocation_deadline = None
+
+# Documents sent as one album (media group) arrive as separate updates; each
+# member is parked under catalog/groups/<media_group_id>/ and, after the wait,
+# the newest member ingests the whole group
+MEDIA_GROUP_PREFIX = 'catalog/groups/'
+MEDIA_GROUP_WAIT_SECONDS = float(os.environ.get('MEDIA_GROUP_WAIT_SECONDS', '3'))
+
+# Minimum number of newest files shown on the static index.html; the index is
+# extended to the next archive page boundary so no row repeats on the archive
+STATIC_INDEX_LIMIT = 50
+
+# Lazy listing: pages ship only the first screen of rows and fetch the rest
+# as JSON while scrolling, from page/<n>.json on the static website or from
+# /api/files on the Function URL
+LAZY_LISTING = os.environ.get('LAZY_LISTING', '').lower() in ('1', 'true', 'yes')
+LAZY_FIRST_SCREEN_ROWS = int(os.environ.get('LAZY_FIRST_SCREEN_ROWS', '20'))
+LAZY_API_PAGE_SIZE = 50
+
+# Client-side search index for the static website: search/<prefix>.json holds
+# every filename token starting with that two-character prefix, so the browser
+# fetches only the shards for the words it is looking for
+SEARCH_INDEX_PREFIX = 'search/'
+SEARCH_SHARD_PREFIX_LENGTH = 2
+SEARCH_INDEX_UPDATE_ATTEMPTS = 10
+
+# Public HTTPS base URL of the bucket; when set, the dynamic listing links the
+# shared stylesheet published there instead of inlining it. The website
+# endpoint is HTTP-only, which an HTTPS page can't load stylesheets from
+ASSET_BASE_URL = os.environ.get('ASSET_BASE_URL', '').rstrip('/')
+CSS_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Generated pages are stored gzip-encoded (the S3 website endpoint can't
+# negotiate, and every browser accepts gzip); Function URL responses use the
+# best encoding the client accepts
+GZIP_LEVEL = 9
+RESPONSE_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+# Hashed asset keys already published by this container
+published_assets = set()
+
+# Number of files per static archive page (page/1.html holds the oldest files).
+# Full archive pages never change, so an upload only rewrites index.html
+STATIC_PAGE_SIZE = 50
+
+class ListingCache:
+    """Small TTL + LRU cache that lives as long as the warm Lambda container.
+    
+    Holds catalog reads and rendered pages so repeated GETs within the TTL
+    cost no S3 requests. Uploads in the same container clear it.
+    """
+    
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        now = time.monotonic()
+        cached = self.entries.get(key)
+        if cached is not None and cached[0] > now:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            logger.info(f"Listing cache hit: {key} (hits={self.hits}, misses={self.misses})")
+            return cached[1]
+        
+        self.misses += 1
+        logger.info(f"Listing cache miss: {key} (hits={self.hits}, misses={self.misses})")
+        value = compute()
+        if self.ttl > 0:
+            self.entries[key] = (now + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+    
+    def clear(self):
+        self.entries.clear()
+
+listing_cache = ListingCache(LISTING_CACHE_TTL, LISTING_CACHE_SIZE)
+
+class SqsIngestQueue:
+    """Ingestion queue backed by SQS; jobs come back as SQS event records"""
+    
+    def __init__(self, queue_url):
+        self.queue_url = queue_url
+        self.sqs_client = boto3.client('sqs', region_name=AWS_REGION)
+    
+    def enqueue(self, job):
+        self.sqs_client.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(job))
+
+class InlineIngestQueue:
+    """In-process stand-in for the ingestion queue that runs jobs immediately"""
+    
+    def enqueue(self, job):
+        process_ingest_job(job)
+
+ingest_queue = SqsIngestQueue(INGEST_QUEUE_URL) if INGEST_QUEUE_URL else InlineIngestQueue()
+
 def lambda_handler(event, context):
     """Main Lambda handler - handles 3 roles:
     1. Webhook registration (custom resource)
-    2. Telegram bot webhook
-    3. File listing HTTP endpoint
+    2. Telegram bot webhook (and the SQS worker that processes its updates)
+    3. File listing HTTP endpoint (HTML page and JSON API at /api/files)
     """
     try:
         logger.info(f"Received event: {json.dumps(event, default=str)}")
@@ -32,6 +254,18 @@ def lambda_handler(event, context):
         if 'RequestType' in event and 'ServiceToken' in event:
             return handle_webhook_registration(event, context)
         
+        # Role 2 worker: process queued Telegram updates
+        if event.get('Records') and event['Records'][0].get('eventSource') == 'aws:sqs':
+            return handle_ingest_records(event, context)
+        
+        # Maintenance: move existing files to the configured key layout
+        if event.get('Action') == 'migrate-key-layout':
+            return handle_key_layout_migration(event, context)
+        
+        # Maintenance: index the content of files stored before deduplication
+        if event.get('Action') == 'backfill-content-hashes':
+            return handle_content_hash_backfill(event, context)
+        
         # Role 2 & 3: Handle HTTP requests from Lambda Function URL
         request_context = event.get('requestContext', {})
         http_method = request_context.get('http', {}).get('method', '')
@@ -40,7 +274,9 @@ def lambda_handler(event, context):
             # Role 2: Handle Telegram webhook
             return handle_telegram_webhook(event, context)
         elif http_method == 'GET':
-            # Role 3: Serve file listing HTML page
+            # Role 3: Serve file listing as JSON or as an HTML page
+            if event.get('rawPath') == '/api/files':
+                return handle_api_files(event, context)
             return handle_file_listing(event, context)
         else:
             return {
@@ -107,43 +343,146 @@ def handle_webhook_registration(event, context):
         }
 
 def handle_telegram_webhook(event, context):
-    """Role 2: Handle incoming Telegram messages"""
+    """Role 2: Accept an incoming Telegram update and queue it for processing.
+    
+    Downloads can take longer than Telegram is willing to wait, so the
+    webhook only validates and enqueues the update and answers right away.
+    """
     try:
         body = json.loads(event['body'])
         
-        if 'message' not in body:
+        if 'message' not in body or 'chat' not in body['message']:
+            return {'statusCode': 200, 'body': 'OK'}
+        
+        # Telegram redelivers updates after slow or failed responses
+        update_id = body.get('update_id')
+        if update_id is not None and not claim_update(update_id):
+            logger.info(f"Ignoring redelivered update {update_id}")
             return {'statusCode': 200, 'body': 'OK'}
-            
-        message = body['message']
-        chat_id = message['chat']['id']
-        
-        # Handle different message types
-        if 'document' in message:
-            handle_file_upload(message, chat_id)
-        elif 'text' in message:
-            handle_text_message(message, chat_id)
-        else:
-            send_telegram_message(chat_id, "Send EPUB/PDF files or direct file URLs")
         
+        try:
+            ingest_queue.enqueue({'update': body})
+        except Exception:
+            if update_id is not None:
+                # Let Telegram's retry of this update through
+                release_update(update_id)
+            raise
         return {'statusCode': 200, 'body': 'OK'}
         
     except Exception as e:
         logger.error(f"Error in telegram webhook: {str(e)}")
         return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
 
+def claim_update(update_id):
+    """Record a Telegram update as accepted; returns False if it already was.
+    
+    A per-container LRU answers warm replays without any request; otherwise
+    a conditional create of an S3 marker decides across containers.
+    """
+    if update_id in processed_updates:
+        processed_updates.move_to_end(update_id)
+        return False
+    
+    try:
+        s3_client.put_object(
+            Bucket=BUCKET_NAME,
+            Key=f"{UPDATE_MARKER_PREFIX}{update_id}",
+            Body=b'',
+            IfNoneMatch='*'
+        )
+        claimed = True
+    except ClientError as e:
+        if not is_precondition_error(e):
+            raise
+        claimed = False
+    
+    processed_updates[update_id] = True
+    while len(processed_updates) > PROCESSED_UPDATES_CACHE_SIZE:
+        processed_updates.popitem(last=False)
+    return claimed
+
+def release_update(update_id):
+    """Forget an update whose processing could not be started"""
+    processed_updates.pop(update_id, None)
+    try:
+        s3_client.delete_object(Bucket=BUCKET_NAME, Key=f"{UPDATE_MARKER_PREFIX}{update_id}")
+    except ClientError as e:
+        logger.error(f"Error releasing update marker {update_id}: {str(e)}")
+
+def handle_ingest_records(event, context):
+    """Role 2 worker: process Telegram updates delivered by SQS.
+    
+    Failed records are reported individually so SQS only retries those.
+    """
+    global invocation_deadline
+    invocation_deadline = None
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        invocation_deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - INVOCATION_RESERVE_SECONDS
+    
+    failures = []
+    for record in event['Records']:
+        try:
+            process_ingest_job(json.loads(record['body']))
+        except Exception as e:
+            logger.error(f"Error processing ingest job {record.get('messageId')}: {str(e)}")
+            failures.append({'itemIdentifier': record['messageId']})
+    return {'batchItemFailures': failures}
+
+def process_ingest_job(job):
+    """Process one queued Telegram update"""
+    message = job['update']['message']
+    chat_id = message['chat']['id']
+    
+    # Handle different message types
+    if 'document' in message and message.get('media_group_id'):
+        handle_media_group_member(message, chat_id)
+    elif 'document' in message:
+        handle_file_upload(message, chat_id)
+    elif 'text' in message:
+        handle_text_message(message, chat_id)
+    else:
+        send_telegram_message(chat_id, "Send EPUB/PDF files or direct file URLs")
+
 def handle_file_listing(event, context):
     """Role 3: Serve HTML page with file list"""
     try:
-        files = get_recent_files_from_s3()
-        html_content = generate_html_page(files)
+        limit = LAZY_FIRST_SCREEN_ROWS if LAZY_LISTING else 20
+        # The ETag and the rows come from the same manifest snapshot, so a
+        # page is never labelled with a newer catalog version than it shows
+        try:
+            manifest, manifest_etag = listing_cache.get_or_compute('manifest', load_catalog_manifest)
+            entries, etag = manifest['files'][:limit], get_listing_etag(manifest_etag)
+        except (ClientError, ValueError, KeyError) as e:
+            logger.error(f"Error reading catalog manifest, listing S3 instead: {str(e)}")
+            entries, etag = [object_to_manifest_entry(obj) for obj in list_recent_objects(limit)], None
+        
+        if etag and etag_matches(get_request_header(event, 'if-none-match'), etag):
+            return {
+                'statusCode': 304,
+                'headers': {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+            }
+        
+        if ASSET_BASE_URL:
+            publish_css_asset()
+        encoding = negotiate_encoding(get_request_header(event, 'accept-encoding'))
+        render = lambda: encode_response_body(generate_html_page(get_download_files(entries)), encoding)
+        body = listing_cache.get_or_compute(f"page:{etag}:{encoding}", render) if etag else render()
+        
+        headers = {
+            'Content-Type': 'text/html; charset=utf-8',
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+        if etag:
+            headers['ETag'] = etag
+        if encoding:
+            headers['Content-Encoding'] = encoding
         
         return {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'text/html; charset=utf-8',
-                'Cache-Control': 'no-cache'
-            },
-            'body': html_content
+            'headers': headers,
+            'body': body,
+            'isBase64Encoded': encoding is not None
         }
         
     except Exception as e:
@@ -154,35 +493,275 @@ def handle_file_listing(event, context):
             'body': f'<html><body><h1>Error</h1><p>{str(e)}</p></body></html>'
         }
 
-def handle_file_upload(message, chat_id):
-    """Handle file uploads from Telegram"""
+def get_request_header(event, name):
+    """Get a request header from a Function URL event (names are lowercase)"""
+    return (event.get('headers') or {}).get(name)
+
+def etag_matches(if_none_match, etag):
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return etag in candidates or etag in [tag[2:] for tag in candidates if tag.startswith('W/')]
+
+def get_listing_etag(manifest_etag):
+    """Compute the ETag of the dynamic listing page from the manifest it shows.
+    
+    The manifest ETag changes on every upload; the time window makes the
+    page change before its presigned links expire.
+    """
+    window = int(time.time() // LISTING_ETAG_WINDOW)
+    # The stylesheet key changes the page when a deploy changes the CSS
+    return '"%s"' % hashlib.sha256(f"{manifest_etag}:{window}:{CSS_ASSET_KEY}".encode('utf-8')).hexdigest()[:32]
+
+def handle_api_files(event, context):
+    """Role 3: Serve a page of the catalog as compact JSON records.
+    
+    Query parameters: `limit` (page size), `cursor` (opaque value from the
+    previous page's `next_cursor`) and `links=1` to include presigned URLs.
+    """
+    params = event.get('queryStringParameters') or {}
     try:
-        document = message['document']
-        file_name = document.get('file_name', 'unknown_file')
-        file_size = document.get('file_size', 0)
+        limit = int(params.get('limit', API_DEFAULT_LIMIT))
+        if not 1 <= limit <= API_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {API_MAX_LIMIT}")
+        after = decode_api_cursor(params['cursor']) if params.get('cursor') else None
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': str(e)})
+        }
+    
+    include_links = params.get('links') == '1'
+    
+    try:
+        manifest, _ = listing_cache.get_or_compute('manifest', load_catalog_manifest)
+        page, next_cursor = get_catalog_page(manifest['files'], after, limit)
         
-        # Validate file
-        if file_size > 20 * 1024 * 1024:  # 20MB limit
-            send_telegram_message(chat_id, "❌ File too large (max 20MB)")
-            return
+        records = []
+        for entry in page:
+            record = manifest_entry_to_record(entry)
+            if include_links:
+                record['url'] = s3_client.generate_presigned_url(
+                    'get_object',
+                    Params={'Bucket': BUCKET_NAME, 'Key': entry['key']},
+                    ExpiresIn=PRESIGNED_URL_EXPIRY
+                )
+            records.append(record)
         
-        if not file_name.lower().endswith(('.epub', '.pdf')):
-            send_telegram_message(chat_id, "❌ Only EPUB and PDF files allowed")
-            return
+        body = json.dumps({
+            'files': records,
+            'next_cursor': next_cursor,
+            'total': len(manifest['files'])
+        }, separators=(',', ':'))
         
-        # Download and store
-        file_content = download_telegram_file(document['file_id'])
-        if file_content:
-            s3_key = f"files/{datetime.now().strftime('%Y/%m/%d')}/{file_name}"
-            upload_to_s3(file_content, s3_key, file_name)
-            send_telegram_message(chat_id, f"✅ File '{file_name}' uploaded successfully!")
+        headers = {
+            'Content-Type': 'application/json',
+            # Presigned links expire, plain records only change on upload
+            'Cache-Control': 'private, max-age=300' if include_links else 'public, max-age=60',
+            'Vary': 'Accept-Encoding'
+        }
+        encoding = negotiate_encoding(get_request_header(event, 'accept-encoding'))
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': encode_response_body(body, encoding),
+            'isBase64Encoded': encoding is not None
+        }
+        
+    except ClientError as e:
+        logger.error(f"Error serving file API: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': 'Internal server error'})
+        }
+
+def encode_api_cursor(entry):
+    """Encode the position just after a manifest entry as an opaque cursor"""
+    raw = json.dumps([entry['last_modified'], entry['key']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_api_cursor(cursor):
+    """Decode an API cursor into a (last_modified, key) position"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_modified, key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return str(last_modified), str(key)
+    except (ValueError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+
+def get_catalog_page(entries, after, limit):
+    """Return up to `limit` newest-first entries following the `after` position.
+    
+    The position is a (last_modified, key) pair rather than an offset, so
+    uploads between requests don't shift or repeat rows. Returns the page and
+    the cursor for the next one (None on the last page).
+    """
+    start = 0
+    if after is not None:
+        # Binary search on the descending (last_modified, key) order
+        low, high = 0, len(entries)
+        while low < high:
+            middle = (low + high) // 2
+            if (entries[middle]['last_modified'], entries[middle]['key']) >= after:
+                low = middle + 1
+            else:
+                high = middle
+        start = low
+    
+    page = entries[start:start + limit]
+    next_cursor = encode_api_cursor(page[-1]) if page and start + limit < len(entries) else None
+    return page, next_cursor
+
+def handle_file_upload(message, chat_id):
+    """Handle file uploads from Telegram"""
+    try:
+        result = ingest_telegram_document(message['document'])
+        if result['duplicate_of']:
+            send_telegram_message(chat_id, format_duplicate_message(result['file_name'], result['duplicate_of']))
         else:
-            send_telegram_message(chat_id, "❌ Failed to download file")
-            
+            send_telegram_message(chat_id, f"✅ File '{result['file_name']}' uploaded successfully!")
+        
+    except InvalidDocumentError as e:
+        send_telegram_message(chat_id, f"❌ {str(e)}")
     except Exception as e:
         logger.error(f"Error uploading file: {str(e)}")
         send_telegram_message(chat_id, f"❌ Error: {str(e)}")
 
+def handle_media_group_member(message, chat_id):
+    """Handle one document of an album, ingesting the whole album once.
+    
+    Every member is parked in S3; after MEDIA_GROUP_WAIT_SECONDS the member
+    with the highest message_id ingests the group and sends one combined
+    confirmation. Updates are neither ordered nor serialized, so members
+    may still park while it ingests; it keeps ingesting until no parked
+    members are left.
+    """
+    group_prefix = f"{MEDIA_GROUP_PREFIX}{message['media_group_id']}/"
+    member_key = f"{group_prefix}{message['message_id']:012d}.json"
+    # Park only what ingest needs, not the sender's or chat's details
+    member = {'message_id': message['message_id'], 'document': message['document']}
+    s3_client.put_object(
+        Bucket=BUCKET_NAME,
+        Key=member_key,
+        Body=json.dumps(member).encode('utf-8'),
+        ContentType='application/json'
+    )
+    
+    if MEDIA_GROUP_WAIT_SECONDS > 0:
+        time.sleep(MEDIA_GROUP_WAIT_SECONDS)
+    
+    member_keys = list_media_group_members(group_prefix)
+    if not member_keys or member_keys[-1] != member_key:
+        # The newer member re-lists the group after deleting its own key
+        logger.info(f"Leaving media group {message['media_group_id']} to its newest member")
+        return
+    
+    while member_keys:
+        claimed = [key for key in member_keys if claim_media_group_member(key)]
+        if claimed:
+            documents = [
+                json.loads(s3_client.get_object(Bucket=BUCKET_NAME, Key=key)['Body'].read())['document']
+                for key in claimed
+            ]
+            ingest_document_batch(documents, chat_id)
+        
+        for key in member_keys:
+            s3_client.delete_object(Bucket=BUCKET_NAME, Key=key)
+        # Pick up members that parked while this batch was ingesting
+        member_keys = list_media_group_members(group_prefix)
+
+def list_media_group_members(group_prefix):
+    """Keys of the album members parked under group_prefix, oldest message first"""
+    return sorted(obj['Key'] for obj in iter_s3_objects(group_prefix) if obj['Key'].endswith('.json'))
+
+def claim_media_group_member(member_key):
+    """Claim a parked album member for ingest; False if another invocation has it.
+    
+    Claims are left for the lifecycle rule, so a member is never ingested twice.
+    """
+    try:
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=member_key[:-len('.json')] + '.claimed',
+                             Body=b'', IfNoneMatch='*')
+        return True
+    except ClientError as e:
+        if not is_precondition_error(e):
+            raise
+        return False
+
+def ingest_document_batch(documents, chat_id):
+    """Ingest several Telegram documents concurrently and reply with one summary"""
+    def ingest(document):
+        file_name = document.get('file_name', 'unknown_file')
+        try:
+            return file_name, ingest_telegram_document(document, publish=False), None
+        except InvalidDocumentError as e:
+            return file_name, None, str(e)
+        except Exception as e:
+            logger.error(f"Error uploading file {file_name}: {str(e)}")
+            return file_name, None, str(e)
+    
+    with ThreadPoolExecutor(max_workers=URL_DOWNLOAD_WORKERS) as executor:
+        outcomes = list(executor.map(ingest, documents))
+    
+    publish_batch(outcomes)
+    saved = sum(1 for _, result, _ in outcomes if result and not result['duplicate_of'])
+    send_telegram_message(chat_id, f"📥 Saved {saved} of {len(documents)} files:\n" + "\n".join(format_batch_outcomes(outcomes)))
+
+def ingest_telegram_document(document, publish=True):
+    """Validate a Telegram document and stream it into S3.
+    
+    Returns the upload_to_s3 result with the stored `file_name` added.
+    Raises InvalidDocumentError with a user-facing reason when the document
+    is rejected or can't be downloaded.
+    """
+    file_name = document.get('file_name', 'unknown_file')
+    file_size = document.get('file_size', 0)
+    
+    # Validate file
+    if file_size > TELEGRAM_MAX_FILE_SIZE:
+        raise InvalidDocumentError(f"File too large (max {TELEGRAM_MAX_FILE_SIZE // (1024 * 1024)}MB)")
+    
+    if not file_name.lower().endswith(('.epub', '.pdf')):
+        raise InvalidDocumentError("Only EPUB and PDF files allowed")
+    
+    # Stream the download straight into S3
+    response = download_telegram_file(document['file_id'])
+    if response is None:
+        raise InvalidDocumentError("Failed to download file")
+    
+    s3_key = build_file_key(file_name)
+    with response:
+        result = upload_to_s3(response.iter_content(DOWNLOAD_CHUNK_SIZE), s3_key, file_name, publish=publish)
+    return dict(result, file_name=file_name)
+
+def publish_batch(outcomes):
+    """Publish the static website once after a batch stored at least one new file"""
+    if any(result and not result['duplicate_of'] for _, result, _ in outcomes):
+        try:
+            publish_current_static_site()
+        except Exception as e:
+            logger.error(f"Failed to regenerate static index: {str(e)}")
+
+def format_batch_outcomes(outcomes):
+    """Summary lines for (name, result, error) outcomes of a batch"""
+    lines = []
+    for name, result, error in outcomes:
+        if error:
+            lines.append(f"❌ {name}: {error}")
+        elif result['duplicate_of']:
+            lines.append(f"📚 {name}: already in the library as '{os.path.basename(result['duplicate_of'])}'")
+        else:
+            lines.append(f"✅ {name}")
+    return lines
+
 def handle_text_message(message, chat_id):
     """Handle text messages (commands and URLs)"""
     try:
@@ -219,6 +798,7 @@ def handle_text_message(message, chat_id):
 📁 **File Management:**
 • Send EPUB/PDF files directly
 • Send direct download URLs (must end with .epub or .pdf)
+• Paste several URLs in one message to download them together
 
 🌐 **Access Methods:**
 • **S3 Static Website** - Permanent direct links
@@ -231,8 +811,12 @@ def handle_text_message(message, chat_id):
             
             send_telegram_message(chat_id, help_msg)
             
-        elif text.startswith(('http://', 'https://')):
-            handle_url_download(text, chat_id)
+        elif extract_urls(message):
+            urls = extract_urls(message)
+            if len(urls) == 1:
+                handle_url_download(urls[0], chat_id)
+            else:
+                handle_url_batch(urls, chat_id)
         else:
             send_telegram_message(chat_id, "Send `/help` for commands, upload a file, or send a direct file URL")
             
@@ -243,36 +827,267 @@ def handle_text_message(message, chat_id):
 def handle_url_download(url, chat_id):
     """Download file from URL"""
     try:
-        if not url.lower().endswith(('.epub', '.pdf')):
+        if not is_supported_url(url):
             send_telegram_message(chat_id, "❌ URL must point to an EPUB or PDF file")
             return
         
         send_telegram_message(chat_id, f"⬇️ Downloading from URL...")
         
-        # Download file
-        response = requests.get(url, timeout=25, stream=True)
+        result = download_url_to_s3(url)
+        
+        if result['duplicate_of']:
+            send_telegram_message(chat_id, format_duplicate_message(result['file_name'], result['duplicate_of']))
+        else:
+            send_telegram_message(chat_id, f"✅ File '{result['file_name']}' downloaded and saved!")
+        
+    except FileTooLargeError:
+        send_telegram_message(chat_id, "❌ File too large (max 20MB)")
+    except Exception as e:
+        logger.error(f"Error downloading URL: {str(e)}")
+        send_telegram_message(chat_id, f"❌ Download failed: {str(e)}")
+
+def handle_url_batch(urls, chat_id):
+    """Download several URLs from one message concurrently and reply with one summary"""
+    supported = [url for url in urls if is_supported_url(url)]
+    send_telegram_message(chat_id, f"⬇️ Downloading {len(supported)} files...")
+    
+    def download(url):
+        name = os.path.basename(urllib.parse.urlparse(url).path)
+        try:
+            result = download_url_to_s3(url, publish=False)
+            return result['file_name'], result, None
+        except FileTooLargeError:
+            return name, None, "file too large (max 20MB)"
+        except Exception as e:
+            logger.error(f"Error downloading URL {url}: {str(e)}")
+            return name, None, str(e)
+    
+    with ThreadPoolExecutor(max_workers=URL_DOWNLOAD_WORKERS) as executor:
+        outcomes = list(executor.map(download, supported))
+    
+    # Publish the static website once for the whole batch
+    publish_batch(outcomes)
+    
+    lines = format_batch_outcomes(outcomes)
+    for url in urls:
+        if url not in supported:
+            lines.append(f"⏭️ {url}: not an EPUB or PDF link")
+    
+    saved = sum(1 for _, result, _ in outcomes if result and not result['duplicate_of'])
+    send_telegram_message(chat_id, f"📥 Saved {saved} of {len(urls)} links:\n" + "\n".join(lines))
+
+def download_url_to_s3(url, publish=True):
+    """Stream a URL into S3, enforcing the size limit.
+    
+    Returns the upload_to_s3 result with the stored `file_name` added.
+    Raises FileTooLargeError when the file exceeds MAX_FILE_SIZE.
+    """
+    response = requests.get(url, timeout=25, stream=True)
+    with response:
         response.raise_for_status()
         
-        # Check size
+        # Check size up front when the server announces it
         content_length = response.headers.get('content-length')
-        if content_length and int(content_length) > 20 * 1024 * 1024:
-            send_telegram_message(chat_id, "❌ File too large (max 20MB)")
-            return
+        if content_length and int(content_length) > MAX_FILE_SIZE:
+            raise FileTooLargeError(f"Content-Length {content_length} exceeds {MAX_FILE_SIZE} bytes")
         
         # Extract filename
         parsed_url = urllib.parse.urlparse(url)
         file_name = os.path.basename(parsed_url.path) or f"download_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
-        # Store file
-        file_content = response.content
-        s3_key = f"files/{datetime.now().strftime('%Y/%m/%d')}/{file_name}"
-        upload_to_s3(file_content, s3_key, file_name)
+        if content_length and int(content_length) > UPLOAD_PART_SIZE and \
+                response.headers.get('accept-ranges', '').lower() == 'bytes':
+            # Slow mirrors throttle per connection: fetch part-sized ranges in parallel instead
+            response.close()
+            chunks = iter_ranges_concurrently(url, int(content_length), UPLOAD_PART_SIZE, RANGED_DOWNLOAD_WORKERS)
+        else:
+            chunks = response.iter_content(DOWNLOAD_CHUNK_SIZE)
         
-        send_telegram_message(chat_id, f"✅ File '{file_name}' downloaded and saved!")
+        # Stream into S3, counting bytes since Content-Length may be missing or wrong
+        s3_key = build_file_key(file_name)
+        result = upload_to_s3(iter_capped(chunks, MAX_FILE_SIZE), s3_key, file_name, publish=publish)
+    
+    return dict(result, file_name=file_name)
+
+def iter_ranges_concurrently(url, total_size, range_size, workers):
+    """Download a URL as byte ranges over parallel connections, yielding them in order.
+    
+    Each range is `range_size` bytes, so every yielded block becomes exactly
+    one multipart part. At most `workers` ranges are in flight or waiting,
+    which bounds memory to about workers * range_size.
+    """
+    ranges = iter([(start, min(start + range_size, total_size) - 1) for start in range(0, total_size, range_size)])
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(fetch_url_range, url, start, end) for start, end in islice(ranges, workers))
+        while pending:
+            data = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(executor.submit(fetch_url_range, url, *next_range))
+            yield data
+
+def fetch_url_range(url, start, end):
+    """Fetch bytes start..end (inclusive) of a URL"""
+    response = requests.get(url, headers={'Range': f"bytes={start}-{end}"}, timeout=25)
+    response.raise_for_status()
+    if response.status_code != 206 or len(response.content) != end - start + 1:
+        raise IOError(f"Server did not honour range {start}-{end} (status {response.status_code})")
+    return response.content
+
+def is_supported_url(url):
+    """Check whether a URL points to an EPUB or PDF file"""
+    return urllib.parse.urlparse(url).path.lower().endswith(('.epub', '.pdf'))
+
+def extract_urls(message):
+    """Extract the http(s) URLs of a message, in order and without repeats.
+    
+    Uses the message entities when present (including text_link URLs hidden
+    behind link text) and falls back to scanning the text.
+    """
+    text = message.get('text', '')
+    urls = []
+    entities = message.get('entities', [])
+    if entities:
+        # Entity offsets count UTF-16 code units
+        encoded = text.encode('utf-16-le')
+        for entity in entities:
+            if entity.get('type') == 'url':
+                start = entity['offset'] * 2
+                urls.append(encoded[start:start + entity['length'] * 2].decode('utf-16-le'))
+            elif entity.get('type') == 'text_link':
+                urls.append(entity['url'])
+    else:
+        urls = URL_PATTERN.findall(text)
+    
+    urls = [url.rstrip('.,;)') for url in urls if url.lower().startswith(('http://', 'https://'))]
+    return list(dict.fromkeys(urls))
+
+def handle_key_layout_migration(event, context):
+    """Maintenance: move dated files/ keys to the recent-first layout.
+    
+    Invoke with {"Action": "migrate-key-layout"}. The migration stops before
+    the Lambda timeout and is idempotent, so invoke again until nothing remains.
+    """
+    if KEY_LAYOUT != 'recent':
+        return {'migrated': 0, 'remaining': 0, 'message': 'KEY_LAYOUT is not "recent", nothing to do'}
+    
+    deadline = None
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - 5
+    
+    result = migrate_to_recent_layout(deadline)
+    logger.info(f"Key layout migration: {result}")
+    return result
+
+def migrate_to_recent_layout(deadline=None):
+    """Copy every dated file to its recent-first key and delete the original.
+    
+    The object's LastModified is kept in the new key, so listings keep their
+    order. Returns counts of migrated and remaining objects.
+    """
+    manifest, _ = load_catalog_manifest()
+    known_hashes = {entry['key']: entry.get('sha256') for entry in manifest['files']}
+    moved = {}
+    remaining = 0
+    for obj in iter_s3_objects('files/'):
+        if obj['Key'].startswith(RECENT_PREFIX):
+            continue
+        if deadline is not None and time.monotonic() > deadline:
+            remaining += 1
+            continue
         
-    except Exception as e:
-        logger.error(f"Error downloading URL: {str(e)}")
-        send_telegram_message(chat_id, f"❌ Download failed: {str(e)}")
+        new_key = build_file_key(os.path.basename(obj['Key']), obj['LastModified'], layout='recent')
+        content_hash = known_hashes.get(obj['Key']) or get_object_sha256(obj['Key'])
+        copied = s3_client.copy_object(
+            Bucket=BUCKET_NAME,
+            Key=new_key,
+            CopySource={'Bucket': BUCKET_NAME, 'Key': obj['Key']}
+        )
+        if content_hash:
+            # Keep deduplication pointing at the file's new key
+            move_content_hash(content_hash, obj['Key'], new_key, copied['CopyObjectResult']['ETag'])
+        s3_client.delete_object(Bucket=BUCKET_NAME, Key=obj['Key'])
+        moved[obj['Key']] = new_key
+    
+    if moved:
+        # Point the manifest at the new keys, keeping dates and hashes
+        update_catalog_manifest(lambda files: [
+            dict(f, key=moved[f['key']]) if f['key'] in moved else f for f in files
+        ])
+        # Republish every page so no link points at a deleted key
+        regenerate_static_index()
+    
+    return {'migrated': len(moved), 'remaining': remaining}
+
+def handle_content_hash_backfill(event, context):
+    """Maintenance: record content hashes of files stored before deduplication.
+    
+    Invoke with {"Action": "backfill-content-hashes"}. The backfill stops
+    before the Lambda timeout and is idempotent, so invoke again until
+    nothing remains.
+    """
+    deadline = None
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - 5
+    
+    result = backfill_content_hashes(deadline)
+    logger.info(f"Content hash backfill: {result}")
+    return result
+
+def backfill_content_hashes(deadline=None):
+    """Write hash markers and manifest hashes for files that have none.
+    
+    Files whose content is already held by another key are reported in
+    `duplicates`. Returns counts of hashed and remaining files.
+    """
+    manifest, _ = load_catalog_manifest()
+    hashes = {}
+    duplicates = []
+    remaining = 0
+    for entry in manifest['files']:
+        if entry.get('sha256'):
+            continue
+        if deadline is not None and time.monotonic() > deadline:
+            remaining += 1
+            continue
+        
+        content_hash = get_object_sha256(entry['key'])
+        if content_hash is None:
+            continue
+        existing_key = claim_content_hash(content_hash, entry['key'])
+        if existing_key:
+            if existing_key != entry['key']:
+                duplicates.append(entry['key'])
+        else:
+            etag = s3_client.head_object(Bucket=BUCKET_NAME, Key=entry['key'])['ETag']
+            write_content_hash_marker(content_hash, entry['key'], etag=etag)
+        hashes[entry['key']] = content_hash
+    
+    if hashes:
+        update_catalog_manifest(lambda files: [
+            dict(f, sha256=hashes[f['key']]) if f['key'] in hashes else f for f in files
+        ])
+    
+    return {'hashed': len(hashes), 'duplicates': duplicates, 'remaining': remaining}
+
+def format_duplicate_message(file_name, existing_key):
+    """Reply text for an upload whose content is already in the library"""
+    return f"📚 '{file_name}' is already in the library as '{os.path.basename(existing_key)}' (`{existing_key}`)"
+
+class InvalidDocumentError(Exception):
+    """Raised when a Telegram document is rejected; the message is shown to the user"""
+
+class FileTooLargeError(Exception):
+    """Raised when a download grows past the size limit"""
+
+def iter_capped(chunks, max_bytes):
+    """Pass chunks through, raising FileTooLargeError as soon as more than max_bytes arrive"""
+    received = 0
+    for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise FileTooLargeError(f"Download exceeds {max_bytes} bytes")
+        yield chunk
 
 def handle_regenerate_command(chat_id):
     """Handle /regenerate command to manually update static website"""
@@ -280,8 +1095,8 @@ def handle_regenerate_command(chat_id):
         send_telegram_message(chat_id, "🔄 Regenerating static website...")
         
         # Regenerate the static index
-        files = get_files_for_static_html()
         regenerate_static_index()
+        files = load_catalog_manifest()[0]['files']
         
         # Get deployment outputs info
         website_info = f"""✅ **Static website regenerated!**
@@ -302,12 +1117,35 @@ def handle_regenerate_command(chat_id):
         logger.error(f"Error in regenerate command: {str(e)}")
         send_telegram_message(chat_id, f"❌ Failed to regenerate: {str(e)}")
 
+class LocalFileDownload:
+    """Streams a file from disk through the same interface as a streaming response"""
+    
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+    
+    def iter_content(self, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        return iter(lambda: self.file.read(chunk_size), b'')
+    
+    def close(self):
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
 def download_telegram_file(file_id):
-    """Download file from Telegram servers"""
+    """Open a streaming download of a file from Telegram servers.
+    
+    In TELEGRAM_LOCAL_MODE a file_path that exists on disk is streamed from
+    there without an HTTP download. Returns the streaming response (the caller
+    closes it) or None on failure.
+    """
     try:
         # Get file info
-        file_info_url = f"https://api.telegram.org/bot{BOT_TOKEN}/getFile?file_id={file_id}"
-        response = requests.get(file_info_url, timeout=10)
+        file_info_url = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/getFile"
+        response = telegram_session.get(file_info_url, params={'file_id': file_id}, timeout=10)
         response.raise_for_status()
         
         file_info = response.json()
@@ -316,59 +1154,288 @@ def download_telegram_file(file_id):
         
         file_path = file_info['result']['file_path']
         
+        if TELEGRAM_LOCAL_MODE and os.path.isabs(file_path) and os.path.isfile(file_path):
+            return LocalFileDownload(file_path)
+        
         # Download file
-        download_url = f"https://api.telegram.org/file/bot{BOT_TOKEN}/{file_path}"
-        response = requests.get(download_url, timeout=25)
+        download_url = f"{TELEGRAM_API_BASE}/file/bot{BOT_TOKEN}/{file_path.lstrip('/')}"
+        response = telegram_session.get(download_url, timeout=25, stream=True)
         response.raise_for_status()
         
-        return response.content
+        return response
         
     except Exception as e:
         logger.error(f"Error downloading from Telegram: {str(e)}")
         return None
 
-def upload_to_s3(file_content, s3_key, original_filename):
-    """Upload file to S3 and regenerate static index.html"""
+def upload_to_s3(file_content, s3_key, original_filename, publish=True):
+    """Upload file to S3 and regenerate static index.html
+    
+    `file_content` is either bytes or an iterable of byte chunks, which is
+    streamed to S3 without holding the whole file in memory. Content that is
+    already in the library is not stored again. With `publish=False` the
+    static website is left for the caller to publish. Returns a dict with the
+    `key`, `size` and `sha256` of the upload, and `duplicate_of` set to the
+    existing key when the content was already stored.
+    """
     try:
         content_type = 'application/epub+zip' if original_filename.lower().endswith('.epub') else 'application/pdf'
+        if isinstance(file_content, (bytes, bytearray)):
+            file_content = [file_content]
         
         # Upload the file
-        s3_client.put_object(
-            Bucket=BUCKET_NAME,
-            Key=s3_key,
-            Body=file_content,
-            ContentType=content_type,
-            Metadata={
+        result = stream_to_s3(
+            file_content,
+            s3_key,
+            content_type=content_type,
+            metadata={
                 'original-filename': original_filename,
                 'upload-timestamp': datetime.now().isoformat()
             }
         )
         
-        logger.info(f"File uploaded to S3: {s3_key}")
+        if result['duplicate_of']:
+            logger.info(f"Skipped duplicate of {result['duplicate_of']}: {s3_key}")
+            return result
+        
+        logger.info(f"File uploaded to S3: {s3_key} ({result['size']} bytes)")
+        
+        # Record the file in the catalog manifest
+        manifest = None
+        try:
+            manifest, manifest_etag = add_to_catalog_manifest({
+                'key': s3_key,
+                'size': result['size'],
+                'last_modified': format_timestamp(datetime.now(timezone.utc)),
+                'sha256': result['sha256']
+            })
+        except (ClientError, ValueError, KeyError, RuntimeError) as e:
+            # S3 errors, a corrupt manifest or too many concurrent writers
+            logger.error(f"Failed to update catalog manifest: {str(e)}")
+            # Drop the manifest so the next read rebuilds it from S3
+            invalidate_catalog_manifest()
         
-        # Regenerate static index.html after successful upload
         try:
-            regenerate_static_index()
-            logger.info("Static index.html regenerated successfully")
+            add_to_search_index(s3_key, result['size'])
         except Exception as e:
-            logger.error(f"Failed to regenerate static index: {str(e)}")
-            # Don't fail the upload if index regeneration fails
+            logger.error(f"Failed to update search index: {str(e)}")
+        
+        # Update static index.html after successful upload
+        if publish:
+            try:
+                if manifest is not None:
+                    publish_static_site_debounced(manifest, manifest_etag)
+                else:
+                    regenerate_static_index()
+            except Exception as e:
+                logger.error(f"Failed to regenerate static index: {str(e)}")
+                # Don't fail the upload if index regeneration fails
+        
+        return result
         
     except ClientError as e:
         logger.error(f"S3 upload error: {str(e)}")
         raise
 
+def stream_to_s3(chunks, s3_key, content_type, metadata):
+    """Upload an iterable of byte chunks to S3, holding at most about one part in memory.
+    
+    Files smaller than UPLOAD_PART_SIZE are sent with a single put_object;
+    larger ones become a multipart upload, which is aborted if the stream
+    fails. The SHA-256 is computed on the way; if the content is already
+    stored, nothing is written (the multipart upload is aborted instead of
+    completed). Returns a dict with key, size, sha256 and duplicate_of.
+    """
+    buffer = bytearray()
+    size = 0
+    digest = hashlib.sha256()
+    upload_id = None
+    parts = []
+    claimed = False
+    
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer += chunk
+            size += len(chunk)
+            digest.update(chunk)
+            
+            if len(buffer) >= UPLOAD_PART_SIZE:
+                if upload_id is None:
+                    upload_id = s3_client.create_multipart_upload(
+                        Bucket=BUCKET_NAME,
+                        Key=s3_key,
+                        ContentType=content_type,
+                        Metadata=metadata
+                    )['UploadId']
+                parts.append(upload_s3_part(s3_key, upload_id, len(parts) + 1, buffer))
+                buffer = bytearray()
+        
+        content_hash = digest.hexdigest()
+        result = {'key': s3_key, 'size': size, 'sha256': content_hash, 'duplicate_of': None}
+        
+        result['duplicate_of'] = claim_content_hash(content_hash, s3_key)
+        if result['duplicate_of']:
+            if upload_id is not None:
+                s3_client.abort_multipart_upload(Bucket=BUCKET_NAME, Key=s3_key, UploadId=upload_id)
+            return result
+        claimed = True
+        
+        if upload_id is None:
+            stored = s3_client.put_object(
+                Bucket=BUCKET_NAME,
+                Key=s3_key,
+                Body=buffer,
+                ContentType=content_type,
+                Metadata=dict(metadata, **{'content-sha256': content_hash})
+            )
+        else:
+            if buffer:
+                parts.append(upload_s3_part(s3_key, upload_id, len(parts) + 1, buffer))
+            stored = s3_client.complete_multipart_upload(
+                Bucket=BUCKET_NAME,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        
+        # The ETag identifies this exact object, so a later overwrite of the
+        # key invalidates the marker (multipart objects carry no hash metadata)
+        write_content_hash_marker(content_hash, s3_key, etag=stored['ETag'])
+        return result
+        
+    except Exception:
+        if upload_id is not None:
+            try:
+                s3_client.abort_multipart_upload(Bucket=BUCKET_NAME, Key=s3_key, UploadId=upload_id)
+            except ClientError as e:
+                logger.error(f"Error aborting multipart upload of {s3_key}: {str(e)}")
+        if claimed:
+            release_content_hash(content_hash)
+        raise
+
+def claim_content_hash(content_hash, s3_key):
+    """Record that s3_key is about to hold the content with this hash.
+    
+    The hash marker is created with a conditional write, so concurrent
+    uploads of the same book can't both claim it; it stays pending until
+    write_content_hash_marker confirms the stored object. Returns None if
+    the claim succeeded, or the key already holding (or still receiving)
+    this content, which may be s3_key itself when the same book is sent
+    again under the same name.
+    """
+    marker_key = CONTENT_HASH_PREFIX + content_hash
+    pending = {'pending': True, 'claimed_at': time.time()}
+    try:
+        write_content_hash_marker(content_hash, s3_key, IfNoneMatch='*', **pending)
+        return None
+    except ClientError as e:
+        if not is_precondition_error(e):
+            raise
+    
+    marker = json.loads(s3_client.get_object(Bucket=BUCKET_NAME, Key=marker_key)['Body'].read())
+    existing_key = marker['key']
+    if marker.get('pending'):
+        if existing_key == s3_key:
+            return None
+        if time.time() - marker.get('claimed_at', 0) < CONTENT_HASH_PENDING_SECONDS:
+            # Another upload of this content is still in progress
+            return existing_key
+    elif is_content_stored(existing_key, content_hash, marker.get('etag')):
+        return existing_key
+    
+    # The stored copy is gone or was overwritten, so this upload takes over the hash
+    write_content_hash_marker(content_hash, s3_key, **pending)
+    return None
+
+def write_content_hash_marker(content_hash, s3_key, IfNoneMatch=None, **fields):
+    """Write the hash marker pointing at s3_key (confirmed unless `pending` is given)"""
+    params = {'IfNoneMatch': IfNoneMatch} if IfNoneMatch else {}
+    s3_client.put_object(
+        Bucket=BUCKET_NAME,
+        Key=CONTENT_HASH_PREFIX + content_hash,
+        Body=json.dumps(dict(fields, key=s3_key)).encode('utf-8'),
+        ContentType='application/json',
+        **params
+    )
+
+def is_content_stored(s3_key, content_hash, etag=None):
+    """Whether s3_key still holds the content a confirmed hash marker recorded.
+    
+    Compared by the ETag recorded in the marker, or by the object's
+    content-sha256 metadata for markers without one.
+    """
+    try:
+        head = s3_client.head_object(Bucket=BUCKET_NAME, Key=s3_key)
+    except ClientError as e:
+        if not is_missing_key_error(e):
+            raise
+        return False
+    if etag:
+        return head['ETag'] == etag
+    return head.get('Metadata', {}).get('content-sha256') == content_hash
+
+def move_content_hash(content_hash, old_key, new_key, etag):
+    """Point a hash marker at the new key (with the new ETag) of a moved file"""
+    try:
+        response = s3_client.get_object(Bucket=BUCKET_NAME, Key=CONTENT_HASH_PREFIX + content_hash)
+    except ClientError as e:
+        if not is_missing_key_error(e):
+            raise
+        return
+    if json.loads(response['Body'].read())['key'] == old_key:
+        write_content_hash_marker(content_hash, new_key, etag=etag)
+
+def get_object_sha256(key):
+    """SHA-256 of a stored file, from its metadata or by streaming it.
+    
+    Returns None when the object no longer exists.
+    """
+    try:
+        head = s3_client.head_object(Bucket=BUCKET_NAME, Key=key)
+        if head.get('Metadata', {}).get('content-sha256'):
+            return head['Metadata']['content-sha256']
+        body = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)['Body']
+    except ClientError as e:
+        if not is_missing_key_error(e):
+            raise
+        return None
+    
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: body.read(DOWNLOAD_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def release_content_hash(content_hash):
+    """Drop a hash marker claimed by an upload that then failed"""
+    try:
+        s3_client.delete_object(Bucket=BUCKET_NAME, Key=CONTENT_HASH_PREFIX + content_hash)
+    except ClientError as e:
+        logger.error(f"Error releasing content hash {content_hash}: {str(e)}")
+
+def upload_s3_part(s3_key, upload_id, part_number, data):
+    """Upload one part of a multipart upload and return its completion record"""
+    response = s3_client.upload_part(
+        Bucket=BUCKET_NAME,
+        Key=s3_key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=data
+    )
+    return {'ETag': response['ETag'], 'PartNumber': part_number}
+
 def send_telegram_message(chat_id, text):
     """Send message to Telegram"""
     try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+        url = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/sendMessage"
         payload = {
             'chat_id': chat_id,
             'text': text,
             'parse_mode': 'Markdown'
         }
         
-        response = requests.post(url, json=payload, timeout=10)
+        response = telegram_session.post(url, json=payload, timeout=10)
         response.raise_for_status()
         
     except Exception as e:
@@ -377,10 +1444,10 @@ def send_telegram_message(chat_id, text):
 def set_telegram_webhook(webhook_url):
     """Set Telegram webhook"""
     try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/setWebhook"
+        url = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/setWebhook"
         payload = {'url': webhook_url}
         
-        response = requests.post(url, json=payload, timeout=10)
+        response = telegram_session.post(url, json=payload, timeout=10)
         response.raise_for_status()
         
         result = response.json()
@@ -395,8 +1462,8 @@ def set_telegram_webhook(webhook_url):
 def remove_telegram_webhook():
     """Remove Telegram webhook"""
     try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/deleteWebhook"
-        response = requests.post(url, timeout=10)
+        url = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/deleteWebhook"
+        response = telegram_session.post(url, timeout=10)
         response.raise_for_status()
         
         result = response.json()
@@ -405,107 +1472,537 @@ def remove_telegram_webhook():
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
+def format_timestamp(dt):
+    """Format a timezone-aware datetime the way the catalog manifest stores it"""
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+
+def is_missing_key_error(error):
+    """Check whether a ClientError means the object does not exist"""
+    return error.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound')
+
+def is_precondition_error(error):
+    """Check whether a ClientError is a failed conditional write"""
+    return error.response.get('Error', {}).get('Code') in ('PreconditionFailed', 'ConditionalRequestConflict')
+
+def iter_s3_objects(prefix):
+    """Yield every object under a prefix, following ContinuationToken across pages"""
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        yield from page.get('Contents', [])
+
+def build_file_key(file_name, timestamp=None, layout=None):
+    """Build the S3 key for a stored file according to the key layout"""
+    timestamp = timestamp or datetime.now(timezone.utc)
+    if (layout or KEY_LAYOUT) == 'recent':
+        inverted = RECENT_KEY_MAX - int(timestamp.timestamp() * 1000)
+        return f"{RECENT_PREFIX}{inverted:013d}/{file_name}"
+    return f"files/{timestamp.strftime('%Y/%m/%d')}/{file_name}"
+
+def recent_key_timestamp(key):
+    """Recover the upload time encoded in a recent-first key"""
+    inverted = int(key[len(RECENT_PREFIX):].split('/', 1)[0])
+    return datetime.fromtimestamp((RECENT_KEY_MAX - inverted) / 1000, timezone.utc)
+
+def list_recent_objects(limit, prefix='files/'):
+    """Return the newest `limit` objects under a prefix, newest first.
+    
+    With the recent-first key layout this is a single small LIST. Otherwise
+    it walks all listing pages through a bounded min-heap, so memory stays
+    O(limit) regardless of how many objects the bucket holds.
+    """
+    if KEY_LAYOUT == 'recent' and prefix == 'files/':
+        response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix=RECENT_PREFIX, MaxKeys=limit)
+        return response.get('Contents', [])
+    
+    heap = []
+    for index, obj in enumerate(iter_s3_objects(prefix)):
+        # The index breaks ties so dicts are never compared
+        item = (obj['LastModified'], obj['Key'], index, obj)
+        if len(heap) < limit:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    return [item[-1] for item in sorted(heap, reverse=True)]
+
+def object_to_manifest_entry(obj):
+    """Convert a list_objects_v2 entry into a catalog manifest entry"""
+    last_modified = obj['LastModified']
+    if obj['Key'].startswith(RECENT_PREFIX):
+        # Copies made by the migration carry a new LastModified; the key keeps the original
+        last_modified = recent_key_timestamp(obj['Key'])
+    return {
+        'key': obj['Key'],
+        'size': obj['Size'],
+        'last_modified': format_timestamp(last_modified)
+    }
+
+def load_catalog_manifest():
+    """Read the catalog manifest with a single GET, rebuilding it if it is missing.
+    
+    Returns a (manifest, etag) tuple.
+    """
+    try:
+        response = s3_client.get_object(Bucket=BUCKET_NAME, Key=CATALOG_MANIFEST_KEY)
+    except ClientError as e:
+        if not is_missing_key_error(e):
+            raise
+        logger.info("Catalog manifest not found, rebuilding from S3 listing")
+        return rebuild_catalog_manifest()
+    
+    manifest = json.loads(response['Body'].read())
+    return manifest, response['ETag']
+
+def rebuild_catalog_manifest():
+    """Rebuild the catalog manifest from a full listing of files/"""
+    entries = [object_to_manifest_entry(obj) for obj in iter_s3_objects('files/')]
+    entries.sort(key=lambda x: (x['last_modified'], x['key']), reverse=True)
+    manifest = {'version': 1, 'generation': 0, 'files': entries}
+    
+    try:
+        # Only create the manifest if nobody else did it in the meantime
+        response = put_catalog_manifest(manifest, IfNoneMatch='*')
+    except ClientError as e:
+        if not is_precondition_error(e):
+            raise
+        return load_catalog_manifest()
+    
+    logger.info(f"Catalog manifest rebuilt with {len(entries)} files")
+    return manifest, response['ETag']
+
+def put_catalog_manifest(manifest, **conditions):
+    """Write the catalog manifest, optionally as a conditional write"""
+    listing_cache.clear()
+    return s3_client.put_object(
+        Bucket=BUCKET_NAME,
+        Key=CATALOG_MANIFEST_KEY,
+        Body=json.dumps(manifest, separators=(',', ':')).encode('utf-8'),
+        ContentType='application/json',
+        CacheControl='no-cache',
+        **conditions
+    )
+
+def add_to_catalog_manifest(entry):
+    """Add or replace a file entry in the catalog manifest.
+    
+    Uses optimistic locking on the manifest ETag so concurrent uploads
+    never overwrite each other's entries. Returns the updated manifest
+    and its new ETag.
+    """
+    def add(files):
+        files = [f for f in files if f['key'] != entry['key']]
+        files.append(entry)
+        files.sort(key=lambda x: (x['last_modified'], x['key']), reverse=True)
+        return files
+    
+    return update_catalog_manifest(add)
+
+def update_catalog_manifest(update):
+    """Replace the manifest file list with `update(files)` under optimistic locking.
+    
+    Retries conflicting writes for up to MANIFEST_UPDATE_SECONDS, and never
+    past the invocation deadline. Returns the updated manifest and its new
+    ETag; raises RuntimeError when out of time.
+    """
+    deadline = time.monotonic() + MANIFEST_UPDATE_SECONDS
+    if invocation_deadline is not None:
+        deadline = min(deadline, invocation_deadline)
+    
+    attempt = 0
+    while True:
+        manifest, etag = load_catalog_manifest()
+        manifest['files'] = update(manifest['files'])
+        manifest['generation'] = manifest.get('generation', 0) + 1
+        
+        try:
+            response = put_catalog_manifest(manifest, IfMatch=etag)
+            return manifest, response['ETag']
+        except ClientError as e:
+            if not is_precondition_error(e):
+                raise
+            attempt += 1
+            delay = random.uniform(0, min(MANIFEST_RETRY_MAX_DELAY, 0.05 * attempt))
+            if time.monotonic() + delay >= deadline:
+                break
+            logger.info(f"Catalog manifest changed concurrently, retrying (attempt {attempt + 1})")
+            time.sleep(delay)
+    
+    raise RuntimeError(f"Could not update catalog manifest: still conflicting after {attempt} attempts")
+
+def invalidate_catalog_manifest():
+    """Delete the catalog manifest so that the next read rebuilds it"""
+    listing_cache.clear()
+    try:
+        s3_client.delete_object(Bucket=BUCKET_NAME, Key=CATALOG_MANIFEST_KEY)
+    except ClientError as e:
+        logger.error(f"Error deleting catalog manifest: {str(e)}")
+
+def manifest_entry_to_file(entry):
+    """Convert a manifest entry into the file dict used by the page generators"""
+    return {
+        'filename': os.path.basename(entry['key']),
+        'size': entry['size'],
+        'last_modified': datetime.fromisoformat(entry['last_modified']),
+        's3_key': entry['key']
+    }
+
+def manifest_entry_to_record(entry):
+    """Convert a manifest entry into the compact record of the JSON API and page fragments"""
+    return {
+        'key': entry['key'],
+        'name': os.path.basename(entry['key']),
+        'size': entry['size'],
+        'mtime': int(datetime.fromisoformat(entry['last_modified']).timestamp())
+    }
+
+def get_recent_catalog_entries(limit):
+    """Get the newest manifest entries, falling back to a paginated top-K listing"""
+    try:
+        manifest, _ = listing_cache.get_or_compute('manifest', load_catalog_manifest)
+        return manifest['files'][:limit]
+    except (ClientError, ValueError, KeyError) as e:
+        logger.error(f"Error reading catalog manifest, listing S3 instead: {str(e)}")
+        return [object_to_manifest_entry(obj) for obj in list_recent_objects(limit)]
+
 def get_recent_files_from_s3(limit=20):
     """Get recent files from S3 (dynamic version with presigned URLs)"""
     try:
-        response = s3_client.list_objects_v2(
-            Bucket=BUCKET_NAME,
-            Prefix='files/',
-            MaxKeys=1000
-        )
-        
-        files = []
-        if 'Contents' in response:
-            sorted_objects = sorted(
-                response['Contents'],
-                key=lambda x: x['LastModified'],
-                reverse=True
-            )
-            
-            for obj in sorted_objects[:limit]:
-                presigned_url = s3_client.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': BUCKET_NAME, 'Key': obj['Key']},
-                    ExpiresIn=3600
-                )
-                
-                filename = os.path.basename(obj['Key'])
-                files.append({
-                    'filename': filename,
-                    'size': obj['Size'],
-                    'last_modified': obj['LastModified'],
-                    'download_url': presigned_url
-                })
-        
-        return files
+        return get_download_files(get_recent_catalog_entries(limit))
         
     except ClientError as e:
         logger.error(f"Error listing S3 objects: {str(e)}")
         return []
 
-def get_files_for_static_html(limit=50):
+def get_download_files(entries):
+    """Convert manifest entries into page file dicts with presigned download URLs"""
+    files = []
+    for entry in entries:
+        file_info = manifest_entry_to_file(entry)
+        file_info['download_url'] = s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': BUCKET_NAME, 'Key': entry['key']},
+            ExpiresIn=PRESIGNED_URL_EXPIRY
+        )
+        files.append(file_info)
+    return files
+
+def get_files_for_static_html(limit=STATIC_INDEX_LIMIT):
     """Get recent files from S3 for static website (with S3 keys, no presigned URLs)"""
     try:
-        response = s3_client.list_objects_v2(
-            Bucket=BUCKET_NAME,
-            Prefix='files/',
-            MaxKeys=1000
-        )
-        
-        files = []
-        if 'Contents' in response:
-            sorted_objects = sorted(
-                response['Contents'],
-                key=lambda x: x['LastModified'],
-                reverse=True
-            )
-            
-            for obj in sorted_objects[:limit]:
-                filename = os.path.basename(obj['Key'])
-                files.append({
-                    'filename': filename,
-                    'size': obj['Size'],
-                    'last_modified': obj['LastModified'],
-                    's3_key': obj['Key']  # Relative path for static website
-                })
-        
-        return files
+        return [manifest_entry_to_file(entry) for entry in get_recent_catalog_entries(limit)]
         
     except ClientError as e:
         logger.error(f"Error listing S3 objects for static HTML: {str(e)}")
         return []
 
+def publish_artifact(key, body, content_type, cache_control, metadata=None, compress=True):
+    """Upload a generated artifact unless S3 already holds identical bytes.
+    
+    The SHA-256 of the body is stored as object metadata and compared with
+    a HEAD before writing, so unchanged pages cost no PUT and leave no
+    noncurrent version behind. With `compress` the object is stored
+    gzip-encoded. Returns True if the object was written.
+    """
+    content_hash = hashlib.sha256(body).hexdigest()
+    content_encoding = 'gzip' if compress else None
+    
+    try:
+        existing = s3_client.head_object(Bucket=BUCKET_NAME, Key=key)
+        if (existing.get('Metadata', {}).get('content-sha256') == content_hash
+                and existing.get('ContentEncoding') == content_encoding):
+            logger.info(f"{key} unchanged, skipping upload")
+            return False
+    except ClientError as e:
+        if not is_missing_key_error(e):
+            raise
+    
+    params = {}
+    if compress:
+        body = compress_body(body, 'gzip')
+        params['ContentEncoding'] = content_encoding
+    
+    s3_client.put_object(
+        Bucket=BUCKET_NAME,
+        Key=key,
+        Body=body,
+        ContentType=content_type,
+        CacheControl=cache_control,
+        Metadata=dict(metadata or {}, **{'content-sha256': content_hash}),
+        **params
+    )
+    return True
+
+def compress_body(body, encoding):
+    """Compress bytes for a Content-Encoding ('gzip' or 'br').
+    
+    gzip output carries no timestamp, so identical input compresses to
+    identical bytes.
+    """
+    if encoding == 'br':
+        return brotli.compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+def negotiate_encoding(accept_encoding):
+    """Pick the Content-Encoding for an Accept-Encoding header, None for identity"""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    
+    for coding in RESPONSE_ENCODINGS:
+        if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+def encode_response_body(text, encoding):
+    """Encode a text response body; compressed bodies are base64 for the Function URL"""
+    if encoding is None:
+        return text
+    return base64.b64encode(compress_body(text.encode('utf-8'), encoding)).decode('ascii')
+
+def publish_css_asset():
+    """Publish the stylesheet under its content-hashed key, once per container"""
+    if CSS_ASSET_KEY in published_assets:
+        return
+    if publish_artifact(
+        CSS_ASSET_KEY,
+        HTML_CSS.encode('utf-8'),
+        content_type='text/css; charset=utf-8',
+        cache_control=CSS_CACHE_CONTROL
+    ):
+        logger.info(f"Stylesheet {CSS_ASSET_KEY} published")
+    published_assets.add(CSS_ASSET_KEY)
+
 def regenerate_static_index():
-    """Regenerate and upload index.html to S3 root for static website"""
+    """Regenerate and upload the whole static website"""
+    manifest, _ = load_catalog_manifest()
+    publish_static_site(manifest['files'], generation=manifest.get('generation'), full=True)
+    
+    # Also create/update error.html for static website
+    create_error_html()
+
+def publish_current_static_site():
+    """Publish index.html and any new archive pages for the current manifest"""
+    manifest, _ = load_catalog_manifest()
+    publish_static_site(manifest['files'], generation=manifest.get('generation'))
+
+def publish_static_site_debounced(manifest, manifest_etag):
+    """Publish the static website for a manifest once the current upload burst settles.
+    
+    Every upload bumps the manifest, so after the debounce window only the
+    invocation whose manifest write is still the latest one publishes; the
+    others leave the work to it. Returns True if this invocation published.
+    """
+    if INDEX_DEBOUNCE_SECONDS > 0:
+        time.sleep(INDEX_DEBOUNCE_SECONDS)
+    
+    current_etag = s3_client.head_object(Bucket=BUCKET_NAME, Key=CATALOG_MANIFEST_KEY)['ETag']
+    if current_etag != manifest_etag:
+        logger.info(f"Catalog changed after generation {manifest['generation']}, leaving index.html to a later upload")
+        return False
+    
+    # Render straight from the manifest we wrote: no LIST, no re-read
+    publish_static_site(manifest['files'], generation=manifest['generation'])
+    return True
+
+def publish_static_site(entries, generation=None, full=False):
+    """Publish index.html and the archive pages for newest-first manifest entries.
+    
+    Archive pages are immutable once full, so unless `full` is set publishing
+    stops at the first archive page that is already up to date.
+    """
+    page_count = len(entries) // STATIC_PAGE_SIZE
+    # Files newer than the last full archive page can only be shown here
+    unpaged = len(entries) - page_count * STATIC_PAGE_SIZE
+    lazy = None
+    if LAZY_LISTING:
+        index_entries = entries[:max(LAZY_FIRST_SCREEN_ROWS, unpaged)]
+        if len(entries) > len(index_entries):
+            # Continue from the newest archive page, skipping the files already shown
+            lazy = {'pages': page_count, 'skip': len(index_entries) - unpaged}
+    else:
+        # Show whole archive pages after the unpaged files, so "Older books"
+        # continues exactly where the index ends
+        shown = unpaged
+        while shown < min(STATIC_INDEX_LIMIT, len(entries)):
+            shown += STATIC_PAGE_SIZE
+        index_entries = entries[:shown]
+    # Newest archive page holding files the index doesn't show
+    older_page = -(-(len(entries) - len(index_entries)) // STATIC_PAGE_SIZE)
+    
+    # Pages link the stylesheet, so it goes up first
+    publish_css_asset()
+    publish_static_index(
+        [manifest_entry_to_file(entry) for entry in index_entries],
+        generation=generation,
+        total_count=len(entries),
+        total_size=sum(entry['size'] for entry in entries),
+        page_count=page_count,
+        older_page=older_page,
+        lazy=lazy
+    )
+    
+    if full:
+        publish_search_index(entries)
+    
+    chronological = entries[::-1]
+    for number in range(page_count, 0, -1):
+        page_entries = chronological[(number - 1) * STATIC_PAGE_SIZE:number * STATIC_PAGE_SIZE][::-1]
+        html_content = generate_static_archive_page(number, [manifest_entry_to_file(e) for e in page_entries])
+        written = publish_artifact(
+            f'page/{number}.html',
+            html_content.encode('utf-8'),
+            content_type='text/html; charset=utf-8',
+            cache_control='max-age=86400'
+        )
+        if LAZY_LISTING:
+            fragment = {'files': [manifest_entry_to_record(e) for e in page_entries]}
+            written = publish_artifact(
+                f'page/{number}.json',
+                json.dumps(fragment, separators=(',', ':'), ensure_ascii=False).encode('utf-8'),
+                content_type='application/json; charset=utf-8',
+                cache_control='max-age=86400'
+            ) or written
+        if written:
+            logger.info(f"Static archive page {number} published")
+        elif not full:
+            break
+
+def publish_static_index(files, generation=None, total_count=None, total_size=None, page_count=0,
+                         older_page=None, lazy=None):
+    """Render index.html for the given files and upload it to S3 root"""
     try:
-        # Get files for static HTML (with S3 keys)
-        files = get_files_for_static_html()
-        
         # Generate static HTML
-        html_content = generate_static_html_page(files)
+        html_content = generate_static_html_page(files, total_count, total_size, page_count, lazy, older_page)
         
-        # Upload to S3 root as index.html
-        s3_client.put_object(
-            Bucket=BUCKET_NAME,
-            Key='index.html',
-            Body=html_content.encode('utf-8'),
-            ContentType='text/html; charset=utf-8',
-            CacheControl='max-age=300',  # 5 minute cache
-            Metadata={
-                'generated-at': datetime.now().isoformat(),
-                'file-count': str(len(files))
-            }
-        )
-        
-        logger.info(f"Static index.html regenerated with {len(files)} files")
+        metadata = {
+            'generated-at': datetime.now().isoformat(),
+            'file-count': str(len(files))
+        }
+        if generation is not None:
+            metadata['catalog-generation'] = str(generation)
         
-        # Also create/update error.html for static website
-        create_error_html()
+        # Upload to S3 root as index.html
+        if publish_artifact(
+            'index.html',
+            html_content.encode('utf-8'),
+            content_type='text/html; charset=utf-8',
+            cache_control='max-age=300',  # 5 minute cache
+            metadata=metadata
+        ):
+            logger.info(f"Static index.html regenerated with {len(files)} files")
         
     except ClientError as e:
         logger.error(f"Error regenerating static index: {str(e)}")
         raise
 
+def normalize_search_text(text):
+    """Fold text for matching: NFKD without combining marks, casefolded (ё matches е)"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def search_tokens(key):
+    """Distinct normalized tokens of a file name, without its extension"""
+    name = os.path.splitext(os.path.basename(key))[0]
+    tokens = re.split(r'[\W_]+', normalize_search_text(name))
+    return sorted({token for token in tokens if len(token) >= SEARCH_SHARD_PREFIX_LENGTH})
+
+def search_shard_key(prefix):
+    """S3 key of the search shard for a token prefix"""
+    return f"{SEARCH_INDEX_PREFIX}{prefix}.json"
+
+def add_to_search_shard(shard, key, size, tokens):
+    """Add a file to a shard: {"docs": [[key, size], ...], "tokens": {token: [doc index, ...]}}"""
+    docs = shard.setdefault('docs', [])
+    index = len(docs)
+    docs.append([key, size])
+    for token in tokens:
+        shard.setdefault('tokens', {}).setdefault(token, []).append(index)
+
+def build_search_shards(entries):
+    """Build all search shards for newest-first manifest entries"""
+    shards = {}
+    for entry in entries:
+        by_prefix = {}
+        for token in search_tokens(entry['key']):
+            by_prefix.setdefault(token[:SEARCH_SHARD_PREFIX_LENGTH], []).append(token)
+        for prefix, tokens in by_prefix.items():
+            add_to_search_shard(shards.setdefault(prefix, {}), entry['key'], entry['size'], tokens)
+    return shards
+
+def encode_search_shard(shard):
+    """Serialize a search shard compactly"""
+    return json.dumps(shard, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def publish_search_index(entries):
+    """Publish every search shard for the catalog (unchanged shards are skipped)"""
+    shards = build_search_shards(entries)
+    written = 0
+    for prefix, shard in shards.items():
+        if publish_artifact(
+            search_shard_key(prefix),
+            encode_search_shard(shard),
+            content_type='application/json; charset=utf-8',
+            cache_control='max-age=60'
+        ):
+            written += 1
+    logger.info(f"Search index published: {written} of {len(shards)} shards written")
+
+def add_to_search_index(key, size):
+    """Add one file to the search shards of its tokens.
+    
+    Each shard is updated with optimistic locking on its ETag, like the
+    catalog manifest, so concurrent uploads never drop each other's entries.
+    """
+    by_prefix = {}
+    for token in search_tokens(key):
+        by_prefix.setdefault(token[:SEARCH_SHARD_PREFIX_LENGTH], []).append(token)
+    
+    for prefix, tokens in by_prefix.items():
+        shard_key = search_shard_key(prefix)
+        for attempt in range(SEARCH_INDEX_UPDATE_ATTEMPTS):
+            try:
+                response = s3_client.get_object(Bucket=BUCKET_NAME, Key=shard_key)
+                body = response['Body'].read()
+                if response.get('ContentEncoding') == 'gzip':
+                    body = gzip.decompress(body)
+                shard, conditions = json.loads(body), {'IfMatch': response['ETag']}
+            except ClientError as e:
+                if not is_missing_key_error(e):
+                    raise
+                shard, conditions = {}, {'IfNoneMatch': '*'}
+            
+            if any(doc[0] == key for doc in shard.get('docs', [])):
+                break
+            add_to_search_shard(shard, key, size, tokens)
+            body = encode_search_shard(shard)
+            
+            try:
+                s3_client.put_object(
+                    Bucket=BUCKET_NAME,
+                    Key=shard_key,
+                    Body=compress_body(body, 'gzip'),
+                    ContentType='application/json; charset=utf-8',
+                    ContentEncoding='gzip',
+                    CacheControl='max-age=60',
+                    Metadata={'content-sha256': hashlib.sha256(body).hexdigest()},
+                    **conditions
+                )
+                break
+            except ClientError as e:
+                if not is_precondition_error(e):
+                    raise
+                logger.info(f"Search shard {shard_key} changed concurrently, retrying (attempt {attempt + 1})")
+                time.sleep(random.uniform(0, 0.05 * (attempt + 1)))
+        else:
+            raise RuntimeError(f"Could not update search shard {shard_key}: too many concurrent writers")
+
 def create_error_html():
     """Create error.html for S3 static website"""
     try:
@@ -570,43 +2067,66 @@ def create_error_html():
         </html>
         """
         
-        s3_client.put_object(
-            Bucket=BUCKET_NAME,
-            Key='error.html',
-            Body=error_html.encode('utf-8'),
-            ContentType='text/html; charset=utf-8',
-            CacheControl='max-age=3600'  # 1 hour cache for error page
-        )
-        
-        logger.info("Error page created/updated")
+        if publish_artifact(
+            'error.html',
+            error_html.encode('utf-8'),
+            content_type='text/html; charset=utf-8',
+            cache_control='max-age=3600'  # 1 hour cache for error page
+        ):
+            logger.info("Error page created/updated")
         
     except ClientError as e:
         logger.error(f"Error creating error.html: {str(e)}")
 
-def generate_file_rows(files, use_static_links=False):
-    """Generate HTML table rows for files"""
+def generate_file_rows(files, use_static_links=False, link_prefix=''):
+    """Generate HTML table rows for files as a list of strings, one per row"""
     if not files:
-        return '<tr><td colspan="3" style="text-align: center; color: #666;">No files uploaded yet</td></tr>'
+        return ['<tr><td colspan="3" style="text-align: center; color: #666;">No files uploaded yet</td></tr>']
     
-    file_rows = ""
+    file_rows = []
     for file_info in files:
         size_mb = file_info['size'] / (1024 * 1024)
         size_str = f"{size_mb:.1f} MB" if size_mb >= 1 else f"{file_info['size'] / 1024:.1f} KB"
-        date_str = file_info['last_modified'].strftime('%Y-%m-%d %H:%M')
+        # 'YYYY-MM-DD HH:MM', about twice as fast as strftime on large tables
+        date_str = file_info['last_modified'].isoformat(' ', 'minutes')[:16]
         
         # Use either static relative path or presigned URL
-        file_url = file_info['s3_key'] if use_static_links else file_info['download_url']
+        file_url = link_prefix + file_info['s3_key'] if use_static_links else file_info['download_url']
         
-        file_rows += f"""
+        file_rows.append(f"""
         <tr>
             <td><a href="{file_url}" download="{file_info['filename']}">{file_info['filename']}</a></td>
             <td>{size_str}</td>
             <td>{date_str}</td>
         </tr>
-        """
+        """)
     
     return file_rows
 
+def compile_template(template):
+    """Split a template into (static chunk, slot name) pairs once, at import.
+    
+    Slots are written as {name}; the last pair has no slot (None).
+    """
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
+
+def render_template(compiled, values):
+    """Render a compiled template into a list of string parts.
+    
+    Slot values are strings or lists of strings; lists are spliced in as
+    they are, so large row lists are only copied once by the final join.
+    """
+    parts = []
+    for literal, field in compiled:
+        parts.append(literal)
+        if field is not None:
+            value = values[field]
+            if isinstance(value, list):
+                parts.extend(value)
+            else:
+                parts.append(value)
+    return parts
+
 def get_html_css():
     """Get shared CSS styles for both static and dynamic pages"""
     return """
@@ -714,6 +2234,31 @@ def get_html_css():
             color: white;
             text-decoration: none;
         }
+        .pagination {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            margin-top: 20px;
+            color: #666;
+        }
+        .search-box {
+            width: 100%;
+            box-sizing: border-box;
+            padding: 10px 14px;
+            font-size: 16px;
+            border: 1px solid #ddd;
+            border-radius: 6px;
+            margin-bottom: 10px;
+        }
+        .search-results {
+            list-style: none;
+            padding: 0;
+            margin: 0 0 20px;
+        }
+        .search-results li {
+            padding: 8px 0;
+            border-bottom: 1px solid #eee;
+        }
         .footer {
             text-align: center;
             padding: 20px;
@@ -723,21 +2268,15 @@ def get_html_css():
         }
     """
 
-def generate_html_page_template(files, title_suffix="", subtitle="Your personal book library in the cloud", 
-                              info_text="💡 How to add files:", info_desc="Send EPUB or PDF files to your Telegram bot, or send direct download URLs. Files will appear here automatically.",
-                              footer_text="Powered by AWS Lambda • Files are stored securely in S3", use_static_links=False):
-    """Generate HTML page using shared template (DRY principle)"""
-    file_rows = generate_file_rows(files, use_static_links)
-    css = get_html_css()
-    
-    return f"""
+# Page layout shared by the static and dynamic listings, compiled once at import
+PAGE_TEMPLATE = compile_template("""
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>📚 Flibusta File Manager{title_suffix}</title>
-        <style>{css}</style>
+        {stylesheet}
     </head>
     <body>
         <div class="container">
@@ -754,15 +2293,17 @@ def generate_html_page_template(files, title_suffix="", subtitle="Your personal
                 
                 <div class="stats">
                     <div class="stat">
-                        <div class="stat-number">{len(files)}</div>
+                        <div class="stat-number">{total_count}</div>
                         <div class="stat-label">Total Files</div>
                     </div>
                     <div class="stat">
-                        <div class="stat-number">{sum(f['size'] for f in files) / (1024*1024):.1f}</div>
+                        <div class="stat-number">{total_mb}</div>
                         <div class="stat-label">Total MB</div>
                     </div>
                 </div>
                 
+                {search}
+                
                 <table>
                     <thead>
                         <tr>
@@ -771,11 +2312,15 @@ def generate_html_page_template(files, title_suffix="", subtitle="Your personal
                             <th>📅 Uploaded</th>
                         </tr>
                     </thead>
-                    <tbody>
+                    <tbody id="file-rows">
                         {file_rows}
                     </tbody>
                 </table>
                 
+                {lazy_loader}
+                
+                {navigation}
+                
                 <a href="javascript:location.reload()" class="refresh-btn">🔄 Refresh</a>
                 
                 <div class="footer">
@@ -785,22 +2330,324 @@ def generate_html_page_template(files, title_suffix="", subtitle="Your personal
         </div>
     </body>
     </html>
+    """)
+HTML_CSS = get_html_css()
+# A CSS change yields a new key, so the asset can be cached forever
+CSS_ASSET_KEY = f"assets/app.{hashlib.sha256(HTML_CSS.encode('utf-8')).hexdigest()[:16]}.css"
+
+# Search box of the static index: fetches the shards for the typed words from
+# search/ and shows the files matching all of them (ES5 for e-reader browsers)
+SEARCH_WIDGET = r"""
+                <input id="search" class="search-box" type="search" placeholder="🔍 Search books..." autocomplete="off">
+                <ul id="search-results" class="search-results"></ul>
+                <script>
+                (function () {
+                    var input = document.getElementById('search');
+                    var results = document.getElementById('search-results');
+                    var shards = {};
+                    var latest = 0;
+                    var timer;
+
+                    function normalize(text) {
+                        if (text.normalize) {
+                            text = text.normalize('NFKD').replace(/[\u0300-\u036f]/g, '');
+                        }
+                        return text.toLowerCase();
+                    }
+
+                    function loadShard(prefix, done) {
+                        if (shards[prefix]) {
+                            return done(shards[prefix]);
+                        }
+                        var request = new XMLHttpRequest();
+                        request.open('GET', 'search/' + encodeURIComponent(prefix) + '.json');
+                        request.onload = function () {
+                            // A missing shard means no file has a word with this prefix
+                            shards[prefix] = request.status == 200 ? JSON.parse(request.responseText) : {docs: [], tokens: {}};
+                            done(shards[prefix]);
+                        };
+                        request.onerror = function () {
+                            done({docs: [], tokens: {}});
+                        };
+                        request.send();
+                    }
+
+                    function matches(shard, word) {
+                        var found = {};
+                        for (var token in shard.tokens) {
+                            if (token.lastIndexOf(word, 0) === 0) {
+                                var ids = shard.tokens[token];
+                                for (var i = 0; i < ids.length; i++) {
+                                    found[shard.docs[ids[i]][0]] = shard.docs[ids[i]];
+                                }
+                            }
+                        }
+                        return found;
+                    }
+
+                    function render(sets) {
+                        results.innerHTML = '';
+                        var count = 0;
+                        for (var key in sets[0]) {
+                            if (!sets.every(function (set) { return key in set; })) {
+                                continue;
+                            }
+                            var name = key.split('/').pop();
+                            var size = sets[0][key][1] / 1048576;
+                            var item = document.createElement('li');
+                            var link = document.createElement('a');
+                            link.href = key;
+                            link.setAttribute('download', name);
+                            link.textContent = name;
+                            item.appendChild(link);
+                            item.appendChild(document.createTextNode(' · ' + (size >= 1 ? size.toFixed(1) + ' MB' : (size * 1024).toFixed(1) + ' KB')));
+                            results.appendChild(item);
+                            if (++count == 50) {
+                                break;
+                            }
+                        }
+                        if (!count) {
+                            results.innerHTML = '<li>No matching books</li>';
+                        }
+                    }
+
+                    function search() {
+                        var query = ++latest;
+                        var words = normalize(input.value).split(/[\s.,;:!?()\[\]"'«»–—_\/\\-]+/).filter(function (word) {
+                            return word.length >= 2;
+                        });
+                        if (!words.length) {
+                            results.innerHTML = '';
+                            return;
+                        }
+                        var sets = [];
+                        var pending = words.length;
+                        words.forEach(function (word, n) {
+                            loadShard(word.slice(0, 2), function (shard) {
+                                sets[n] = matches(shard, word);
+                                if (--pending === 0 && query === latest) {
+                                    render(sets);
+                                }
+                            });
+                        });
+                    }
+
+                    input.oninput = function () {
+                        clearTimeout(timer);
+                        timer = setTimeout(search, 200);
+                    };
+                })();
+                </script>"""
+
+# Loads further rows as JSON while scrolling. lazyListing holds either the
+# archive page to fetch next and how many of its files are already shown, or
+# the /api/files cursor after the last row and the page size (ES5 for e-reader
+# browsers)
+LAZY_LOADER_SCRIPT = """
+                <script>
+                (function () {
+                    var config = lazyListing;
+                    var rows = document.getElementById('file-rows');
+                    var button = document.getElementById('load-more');
+                    var loading = false;
+
+                    function formatSize(size) {
+                        var mb = size / 1048576;
+                        return mb >= 1 ? mb.toFixed(1) + ' MB' : (size / 1024).toFixed(1) + ' KB';
+                    }
+
+                    function addRow(record) {
+                        var row = document.createElement('tr');
+                        var cell = document.createElement('td');
+                        var link = document.createElement('a');
+                        link.href = record.url || record.key;
+                        link.setAttribute('download', record.name);
+                        link.textContent = record.name;
+                        cell.appendChild(link);
+                        row.appendChild(cell);
+                        [formatSize(record.size), new Date(record.mtime * 1000).toISOString().slice(0, 16).replace('T', ' ')].forEach(function (text) {
+                            var td = document.createElement('td');
+                            td.textContent = text;
+                            row.appendChild(td);
+                        });
+                        rows.appendChild(row);
+                    }
+
+                    function nextUrl() {
+                        if (config.cursor) {
+                            return 'api/files?links=1&limit=' + config.limit + '&cursor=' + encodeURIComponent(config.cursor);
+                        }
+                        return config.pages > 0 ? 'page/' + config.pages + '.json' : null;
+                    }
+
+                    function finish() {
+                        button.style.display = 'none';
+                        window.onscroll = null;
+                    }
+
+                    function nearBottom() {
+                        if (window.innerHeight + window.pageYOffset >= document.body.offsetHeight - 800) {
+                            loadMore();
+                        }
+                    }
+
+                    function loadMore() {
+                        var url = nextUrl();
+                        if (!url) {
+                            return finish();
+                        }
+                        if (loading) {
+                            return;
+                        }
+                        loading = true;
+                        var request = new XMLHttpRequest();
+                        request.open('GET', url);
+                        request.onload = function () {
+                            loading = false;
+                            if (request.status != 200) {
+                                return;
+                            }
+                            var page = JSON.parse(request.responseText);
+                            page.files.slice(config.skip || 0).forEach(addRow);
+                            config.skip = 0;
+                            if ('next_cursor' in page) {
+                                config.cursor = page.next_cursor;
+                            } else {
+                                config.pages -= 1;
+                            }
+                            if (nextUrl()) {
+                                nearBottom();
+                            } else {
+                                finish();
+                            }
+                        };
+                        request.onerror = function () {
+                            loading = false;
+                        };
+                        request.send();
+                    }
+
+                    button.onclick = function (event) {
+                        event.preventDefault();
+                        loadMore();
+                    };
+                    window.onscroll = nearBottom;
+                    nearBottom();
+                })();
+                </script>"""
+
+def generate_lazy_loader(state):
+    """Generate the load-more button and scroll loader for the given loader state"""
+    return f"""<a href="#" id="load-more" class="refresh-btn">⬇️ Load more</a>
+                <script>var lazyListing = {json.dumps(state)};</script>{LAZY_LOADER_SCRIPT}"""
+
+def generate_html_page_template(files, title_suffix="", subtitle="Your personal book library in the cloud", 
+                              info_text="💡 How to add files:", info_desc="Send EPUB or PDF files to your Telegram bot, or send direct download URLs. Files will appear here automatically.",
+                              footer_text="Powered by AWS Lambda • Files are stored securely in S3", use_static_links=False,
+                              link_prefix="", total_count=None, total_size=None, navigation="",
+                              stylesheet_url=None, search="", lazy=None):
+    """Generate HTML page using shared template (DRY principle)
+    
+    The page links the stylesheet at `stylesheet_url`, or inlines it when None.
+    With `lazy` (the loader state) further rows are fetched while scrolling.
     """
+    if stylesheet_url:
+        stylesheet = f'<link rel="stylesheet" href="{stylesheet_url}">'
+    else:
+        stylesheet = f"<style>{HTML_CSS}</style>"
+    if total_count is None:
+        total_count = len(files)
+    if total_size is None:
+        total_size = sum(f['size'] for f in files)
+    
+    return ''.join(render_template(PAGE_TEMPLATE, {
+        'title_suffix': title_suffix,
+        'stylesheet': stylesheet,
+        'subtitle': subtitle,
+        'info_text': info_text,
+        'info_desc': info_desc,
+        'total_count': str(total_count),
+        'total_mb': f"{total_size / (1024*1024):.1f}",
+        'file_rows': generate_file_rows(files, use_static_links, link_prefix),
+        'search': search,
+        'lazy_loader': generate_lazy_loader(lazy) if lazy else "",
+        'navigation': navigation,
+        'footer_text': footer_text,
+    }))
 
-def generate_static_html_page(files):
-    """Generate static HTML page for S3 website hosting with relative file paths"""
+def generate_static_html_page(files, total_count=None, total_size=None, page_count=0, lazy=None, older_page=None):
+    """Generate static HTML page for S3 website hosting with relative file paths.
+    
+    "Older books" links to `older_page`, the newest archive page with files
+    not shown here (defaults to the newest archive page).
+    """
+    if older_page is None:
+        older_page = page_count
+    navigation = ""
+    if page_count:
+        older_link = f'<a href="page/{older_page}.html">Older books →</a>' if older_page else '<span></span>'
+        navigation = f"""
+                <div class="pagination">
+                    <span>{page_count} archive page{'s' if page_count != 1 else ''}</span>
+                    {older_link}
+                </div>"""
+    
     return generate_html_page_template(
         files=files,
+        total_count=total_count,
+        total_size=total_size,
+        navigation=navigation,
         title_suffix=" (Static)",
         subtitle="Static S3 Website - Direct file access",
         info_text="🌐 Static Website:",
         info_desc="This page is hosted directly on S3 with relative file links. Files are accessible without expiring URLs. Add files via the Telegram bot and they'll appear here automatically.",
         footer_text="Static S3 Website • Files accessible via direct links",
-        use_static_links=True
+        use_static_links=True,
+        stylesheet_url=CSS_ASSET_KEY,
+        search=SEARCH_WIDGET,
+        lazy=lazy
+    )
+
+def generate_static_archive_page(number, files):
+    """Generate an archive page of the static website (page/<number>.html).
+    
+    The page only depends on its own files and number, so it never needs
+    rewriting once the page is full.
+    """
+    older_link = f'<a href="{number - 1}.html">Older books →</a>' if number > 1 else '<span></span>'
+    navigation = f"""
+                <div class="pagination">
+                    <a href="../index.html">← Latest books</a>
+                    {older_link}
+                </div>"""
+    
+    return generate_html_page_template(
+        files=files,
+        title_suffix=f" (Page {number})",
+        subtitle=f"Static S3 Website - Archive page {number}",
+        info_text="🌐 Static Website:",
+        info_desc="Older books, oldest pages first. New uploads appear on the latest page.",
+        footer_text="Static S3 Website • Files accessible via direct links",
+        use_static_links=True,
+        link_prefix="../",
+        navigation=navigation,
+        stylesheet_url="../" + CSS_ASSET_KEY
     )
 
 def generate_html_page(files):
     """Generate HTML page for file listing (dynamic Lambda version with presigned URLs)"""
+    lazy = None
+    if LAZY_LISTING and len(files) >= LAZY_FIRST_SCREEN_ROWS:
+        # The API continues right after the last row of the first screen
+        last = files[-1]
+        lazy = {
+            'cursor': encode_api_cursor({
+                'last_modified': format_timestamp(last['last_modified']),
+                'key': last['s3_key']
+            }),
+            'limit': LAZY_API_PAGE_SIZE
+        }
+    
     return generate_html_page_template(
         files=files,
         title_suffix="",
@@ -808,5 +2655,7 @@ def generate_html_page(files):
         info_text="💡 How to add files:",
         info_desc="Send EPUB or PDF files to your Telegram bot, or send direct download URLs. Files will appear here automatically.",
         footer_text="Powered by AWS Lambda • Files are stored securely in S3",
-        use_static_links=False
+        use_static_links=False,
+        stylesheet_url=f"{ASSET_BASE_URL}/{CSS_ASSET_KEY}" if ASSET_BASE_URL else None,
+        lazy=lazy
     )
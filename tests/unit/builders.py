@@ -0,0 +1,41 @@
+"""Builders for catalog data and Lambda events shared by the unit tests."""
+import json
+from datetime import datetime, timedelta, timezone
+
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+MIB = 1024 * 1024
+
+
+def make_files(count):
+    return [{'filename': f"Книга {i}.epub", 'size': 1000 + i, 'last_modified': BASE_TIME,
+             's3_key': f"files/2024/01/01/Книга {i}.epub", 'download_url': f"https://example.com/{i}"}
+            for i in range(count)]
+
+
+def api_request(lambda_function, **params):
+    event = {
+        'requestContext': {'http': {'method': 'GET'}},
+        'rawPath': '/api/files',
+        'queryStringParameters': {k: str(v) for k, v in params.items()},
+    }
+    return lambda_function.lambda_handler(event, None)
+
+
+def listing_request(lambda_function, headers=None):
+    event = {
+        'requestContext': {'http': {'method': 'GET'}},
+        'rawPath': '/',
+        'headers': headers or {},
+    }
+    return lambda_function.lambda_handler(event, None)
+
+
+def seed_manifest(s3, lambda_function, count):
+    entries = [
+        {'key': f"files/book{i:06d}.epub", 'size': i,
+         'last_modified': lambda_function.format_timestamp(BASE_TIME + timedelta(seconds=i))}
+        for i in range(count - 1, -1, -1)
+    ]
+    manifest = {'version': 1, 'generation': 1, 'files': entries}
+    s3.add_object(lambda_function.CATALOG_MANIFEST_KEY, json.dumps(manifest).encode('utf-8'))
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+# lambda_function reads its configuration from the environment at import time
+os.environ.setdefault('BOT_TOKEN', 'test-token')
+os.environ.setdefault('BUCKET_NAME', 'test-bucket')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'lambda'))
+
+from tests.unit.fake_s3 import FakeS3  # noqa: E402
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: timing runs on large inputs, skipped unless RUN_BENCHMARKS=1')
+
+
+def pytest_collection_modifyitems(config, items):
+    # Timings depend on the machine, so benchmarks only print their numbers on request
+    if os.environ.get('RUN_BENCHMARKS'):
+        return
+    skip = pytest.mark.skip(reason='benchmark, set RUN_BENCHMARKS=1 to run')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def lambda_function():
+    import lambda_function
+    return lambda_function
+
+
+@pytest.fixture(autouse=True)
+def no_debounce(lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'INDEX_DEBOUNCE_SECONDS', 0)
+
+
+@pytest.fixture(autouse=True)
+def empty_listing_cache(lambda_function):
+    lambda_function.listing_cache.clear()
+    yield
+    lambda_function.listing_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_processed_updates(lambda_function):
+    lambda_function.processed_updates.clear()
+    yield
+    lambda_function.processed_updates.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_published_assets(lambda_function):
+    lambda_function.published_assets.clear()
+    yield
+    lambda_function.published_assets.clear()
+
+
+@pytest.fixture
+def s3(lambda_function, monkeypatch):
+    fake = FakeS3()
+    monkeypatch.setattr(lambda_function, 's3_client', fake)
+    return fake
+
+
+@pytest.fixture
+def sent_messages(lambda_function, monkeypatch):
+    messages = []
+    monkeypatch.setattr(lambda_function, 'send_telegram_message',
+                        lambda chat_id, text: messages.append((chat_id, text)))
+    return messages
@@ -0,0 +1,33 @@
+"""Stand-in for a streaming HTTP download (requests response or Telegram file)."""
+
+
+class FakeDownload:
+    """Streaming response stand-in that produces the file chunk by chunk"""
+
+    def __init__(self, size, chunk_size=64 * 1024, fail_after=None):
+        self.size = size
+        self.chunk_size = chunk_size
+        self.fail_after = fail_after
+        self.headers = {}
+        self.closed = False
+
+    def iter_content(self, chunk_size=None):
+        sent = 0
+        while sent < self.size:
+            if self.fail_after is not None and sent >= self.fail_after:
+                raise IOError("connection reset")
+            length = min(self.chunk_size, self.size - sent)
+            yield bytes([sent // self.chunk_size % 251]) * length
+            sent += length
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,178 @@
+"""In-memory stand-in for the subset of the boto3 S3 client used by the bot."""
+import gzip
+import hashlib
+import io
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+
+
+def client_error(code, operation, status=400):
+    return ClientError(
+        {'Error': {'Code': code, 'Message': code}, 'ResponseMetadata': {'HTTPStatusCode': status}},
+        operation
+    )
+
+
+class FakeS3:
+    """Thread-safe fake S3 client supporting conditional writes and multipart uploads"""
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = Counter()
+        self.puts = Counter()
+        self.lock = threading.Lock()
+        self._uploads = {}
+        self._clock = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def _now(self):
+        self._clock += timedelta(seconds=1)
+        return self._clock
+
+    def _store(self, key, body, **params):
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        self.objects[key] = {
+            'Body': body,
+            'ETag': etag,
+            'LastModified': self._now(),
+            'ContentType': params.get('ContentType'),
+            'ContentEncoding': params.get('ContentEncoding'),
+            'CacheControl': params.get('CacheControl'),
+            'Metadata': dict(params.get('Metadata') or {}),
+        }
+        self.puts[key] += 1
+        return etag
+
+    def add_object(self, key, body=b'', last_modified=None):
+        """Seed an object without counting it as a client call"""
+        with self.lock:
+            self._store(key, body)
+            self.puts[key] -= 1
+            if last_modified is not None:
+                self.objects[key]['LastModified'] = last_modified
+
+    def read_text(self, key):
+        """Decoded text of a stored object, undoing its Content-Encoding"""
+        obj = self.objects[key]
+        body = gzip.decompress(obj['Body']) if obj['ContentEncoding'] == 'gzip' else obj['Body']
+        return body.decode('utf-8')
+
+    def put_object(self, Bucket, Key, Body=b'', IfMatch=None, IfNoneMatch=None, **params):
+        with self.lock:
+            self.calls['put_object'] += 1
+            existing = self.objects.get(Key)
+            if IfNoneMatch == '*' and existing is not None:
+                raise client_error('PreconditionFailed', 'PutObject', 412)
+            if IfMatch is not None and (existing is None or existing['ETag'] != IfMatch):
+                raise client_error('PreconditionFailed', 'PutObject', 412)
+            if hasattr(Body, 'read'):
+                Body = Body.read()
+            return {'ETag': self._store(Key, bytes(Body), **params)}
+
+    def get_object(self, Bucket, Key):
+        with self.lock:
+            self.calls['get_object'] += 1
+            obj = self.objects.get(Key)
+            if obj is None:
+                raise client_error('NoSuchKey', 'GetObject', 404)
+            return dict(obj, Body=io.BytesIO(obj['Body']), ContentLength=len(obj['Body']))
+
+    def head_object(self, Bucket, Key):
+        with self.lock:
+            self.calls['head_object'] += 1
+            obj = self.objects.get(Key)
+            if obj is None:
+                raise client_error('404', 'HeadObject', 404)
+            return {k: v for k, v in obj.items() if k != 'Body'}
+
+    def delete_object(self, Bucket, Key):
+        with self.lock:
+            self.calls['delete_object'] += 1
+            self.objects.pop(Key, None)
+            return {}
+
+    def copy_object(self, Bucket, Key, CopySource, **params):
+        with self.lock:
+            self.calls['copy_object'] += 1
+            source = self.objects.get(CopySource['Key'])
+            if source is None:
+                raise client_error('NoSuchKey', 'CopyObject', 404)
+            etag = self._store(Key, source['Body'], ContentType=source['ContentType'], Metadata=source['Metadata'])
+            return {'CopyObjectResult': {'ETag': etag, 'LastModified': self.objects[Key]['LastModified']}}
+
+    def list_objects_v2(self, Bucket, Prefix='', MaxKeys=1000, ContinuationToken=None, StartAfter=None):
+        with self.lock:
+            self.calls['list_objects_v2'] += 1
+            keys = sorted(k for k in self.objects if k.startswith(Prefix))
+            start_after = ContinuationToken or StartAfter
+            if start_after:
+                keys = [k for k in keys if k > start_after]
+            page = keys[:MaxKeys]
+            response = {
+                'KeyCount': len(page),
+                'IsTruncated': len(keys) > MaxKeys,
+                'Contents': [
+                    {'Key': k, 'Size': len(self.objects[k]['Body']),
+                     'LastModified': self.objects[k]['LastModified'], 'ETag': self.objects[k]['ETag']}
+                    for k in page
+                ],
+            }
+            if response['IsTruncated']:
+                response['NextContinuationToken'] = page[-1]
+            if not page:
+                del response['Contents']
+            return response
+
+    def get_paginator(self, operation):
+        assert operation == 'list_objects_v2'
+        return FakePaginator(self.list_objects_v2)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn=3600):
+        return f"https://fake-s3.local/{Params['Key']}?expires={ExpiresIn}"
+
+    def create_multipart_upload(self, Bucket, Key, **params):
+        with self.lock:
+            self.calls['create_multipart_upload'] += 1
+            upload_id = f"upload-{len(self._uploads) + 1}"
+            self._uploads[upload_id] = {'Key': Key, 'Parts': {}, 'Params': params}
+            return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with self.lock:
+            self.calls['upload_part'] += 1
+            if hasattr(Body, 'read'):
+                Body = Body.read()
+            etag = '"%s"' % hashlib.md5(Body).hexdigest()
+            self._uploads[UploadId]['Parts'][PartNumber] = (etag, bytes(Body))
+            return {'ETag': etag}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        with self.lock:
+            self.calls['complete_multipart_upload'] += 1
+            upload = self._uploads.pop(UploadId)
+            body = b''.join(upload['Parts'][p['PartNumber']][1] for p in MultipartUpload['Parts'])
+            return {'ETag': self._store(Key, body, **upload['Params'])}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        with self.lock:
+            self.calls['abort_multipart_upload'] += 1
+            self._uploads.pop(UploadId, None)
+            return {}
+
+
+class FakePaginator:
+    def __init__(self, list_objects):
+        self.list_objects = list_objects
+
+    def paginate(self, **params):
+        token = None
+        while True:
+            if token:
+                params['ContinuationToken'] = token
+            page = self.list_objects(**params)
+            yield page
+            token = page.get('NextContinuationToken')
+            if not page.get('IsTruncated') or not token:
+                return
@@ -0,0 +1,83 @@
+"""Local stand-in for the Telegram Bot API served over plain HTTP/1.1."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeBotApi:
+    """Runs a keep-alive Bot API stand-in on localhost and records what it receives"""
+
+    def __init__(self, files=None, file_paths=None):
+        self.files = files or {}            # file_path -> bytes served under /file/bot<token>/
+        self.file_paths = file_paths or {}  # file_id -> file_path returned by getFile
+        self.calls = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def method_calls(self, method):
+        return [params for name, params in self.calls if name == method]
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with api.lock:
+                    api.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._handle()
+
+            def do_POST(self):
+                self._handle()
+
+            def _handle(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+
+                if url.path.startswith('/file/bot'):
+                    file_path = url.path.split('/', 3)[3]
+                    if file_path not in api.files:
+                        return self._send(404, b'not found')
+                    return self._send(200, api.files[file_path], 'application/octet-stream')
+
+                method = url.path.rsplit('/', 1)[1]
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if body:
+                    params.update(json.loads(body))
+                with api.lock:
+                    api.calls.append((method, params))
+
+                result = True
+                if method == 'getFile':
+                    result = {'file_id': params['file_id'], 'file_path': api.file_paths[params['file_id']]}
+                self._send(200, json.dumps({'ok': True, 'result': result}).encode('utf-8'))
+
+            def _send(self, status, body, content_type='application/json'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
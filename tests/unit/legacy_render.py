@@ -0,0 +1,102 @@
+"""The listing renderer as it was before pages were rendered from a compiled template.
+
+generate_file_rows and generate_html_page_template are copied verbatim from
+lambda_function, so benchmarks and equivalence tests compare against the code
+that actually ran. Only the stylesheet is taken from the current module: it
+has since gained rules for pagination and search, which are not rendering.
+"""
+
+
+def get_html_css():
+    import lambda_function
+    return lambda_function.HTML_CSS
+
+
+def generate_file_rows(files, use_static_links=False):
+    """Generate HTML table rows for files"""
+    if not files:
+        return '<tr><td colspan="3" style="text-align: center; color: #666;">No files uploaded yet</td></tr>'
+    
+    file_rows = ""
+    for file_info in files:
+        size_mb = file_info['size'] / (1024 * 1024)
+        size_str = f"{size_mb:.1f} MB" if size_mb >= 1 else f"{file_info['size'] / 1024:.1f} KB"
+        date_str = file_info['last_modified'].strftime('%Y-%m-%d %H:%M')
+        
+        # Use either static relative path or presigned URL
+        file_url = file_info['s3_key'] if use_static_links else file_info['download_url']
+        
+        file_rows += f"""
+        <tr>
+            <td><a href="{file_url}" download="{file_info['filename']}">{file_info['filename']}</a></td>
+            <td>{size_str}</td>
+            <td>{date_str}</td>
+        </tr>
+        """
+    
+    return file_rows
+
+
+def generate_html_page_template(files, title_suffix="", subtitle="Your personal book library in the cloud", 
+                              info_text="💡 How to add files:", info_desc="Send EPUB or PDF files to your Telegram bot, or send direct download URLs. Files will appear here automatically.",
+                              footer_text="Powered by AWS Lambda • Files are stored securely in S3", use_static_links=False):
+    """Generate HTML page using shared template (DRY principle)"""
+    file_rows = generate_file_rows(files, use_static_links)
+    css = get_html_css()
+    
+    return f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>📚 Flibusta File Manager{title_suffix}</title>
+        <style>{css}</style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>📚 Flibusta File Manager</h1>
+                <p>{subtitle}</p>
+            </div>
+            
+            <div class="content">
+                <div class="info-box">
+                    <strong>{info_text}</strong><br>
+                    {info_desc}
+                </div>
+                
+                <div class="stats">
+                    <div class="stat">
+                        <div class="stat-number">{len(files)}</div>
+                        <div class="stat-label">Total Files</div>
+                    </div>
+                    <div class="stat">
+                        <div class="stat-number">{sum(f['size'] for f in files) / (1024*1024):.1f}</div>
+                        <div class="stat-label">Total MB</div>
+                    </div>
+                </div>
+                
+                <table>
+                    <thead>
+                        <tr>
+                            <th>📖 Filename</th>
+                            <th>📊 Size</th>
+                            <th>📅 Uploaded</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {file_rows}
+                    </tbody>
+                </table>
+                
+                <a href="javascript:location.reload()" class="refresh-btn">🔄 Refresh</a>
+                
+                <div class="footer">
+                    <p>{footer_text}</p>
+                </div>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
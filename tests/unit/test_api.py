@@ -0,0 +1,69 @@
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from tests.unit.builders import BASE_TIME, api_request, seed_manifest
+
+
+def test_api_pages_through_catalog_with_cursor(s3, lambda_function):
+    seed_manifest(s3, lambda_function, 25)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {'limit': 10}
+        if cursor:
+            params['cursor'] = cursor
+        response = api_request(lambda_function, **params)
+        body = json.loads(response['body'])
+        seen.extend(record['name'] for record in body['files'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert response['statusCode'] == 200
+    assert body['total'] == 25
+    assert seen == [f"book{i:06d}.epub" for i in range(24, -1, -1)]
+
+
+def test_api_cursor_is_stable_across_uploads(s3, lambda_function):
+    seed_manifest(s3, lambda_function, 20)
+    first = json.loads(api_request(lambda_function, limit=5)['body'])
+
+    lambda_function.add_to_catalog_manifest({'key': 'files/new.epub', 'size': 1,
+                                             'last_modified': lambda_function.format_timestamp(datetime.now(timezone.utc))})
+    second = json.loads(api_request(lambda_function, limit=5, cursor=first['next_cursor'])['body'])
+
+    assert second['files'][0]['name'] == 'book000014.epub'
+
+
+def test_api_records_are_compact(s3, lambda_function):
+    seed_manifest(s3, lambda_function, 1)
+
+    record = json.loads(api_request(lambda_function)['body'])['files'][0]
+    with_links = json.loads(api_request(lambda_function, links=1)['body'])['files'][0]
+
+    assert record == {'key': 'files/book000000.epub', 'name': 'book000000.epub', 'size': 0,
+                      'mtime': int(BASE_TIME.timestamp())}
+    assert with_links['url'].startswith('https://')
+
+
+def test_api_rejects_bad_parameters(s3, lambda_function):
+    assert api_request(lambda_function, limit=0)['statusCode'] == 400
+    assert api_request(lambda_function, cursor='!!not-a-cursor')['statusCode'] == 400
+
+
+@pytest.mark.benchmark
+def test_benchmark_api_pages_at_100k_files(s3, lambda_function):
+    seed_manifest(s3, lambda_function, 100_000)
+    cursor = json.loads(api_request(lambda_function, limit=1000)['body'])['next_cursor']
+
+    started = time.perf_counter()
+    response = api_request(lambda_function, limit=100, cursor=cursor)
+    elapsed = time.perf_counter() - started
+
+    print(f"API page of 100 at 100k files: {elapsed * 1000:.0f} ms, {len(response['body'])} bytes")
+    assert json.loads(response['body'])['files'][0]['name'] == 'book098999.epub'
+    assert len(response['body']) < 12 * 1024
@@ -3,13 +3,33 @@ import aws_cdk.assertions as assertions
 
 from bookatalog.bookatalog_stack import BookatalogStack
 
-# example tests. To run these tests, uncomment this file along with the example
-# resource in bookatalog/bookatalog_stack.py
 def test_sqs_queue_created():
     app = core.App()
     stack = BookatalogStack(app, "bookatalog")
     template = assertions.Template.from_stack(stack)
 
-#     template.has_resource_properties("AWS::SQS::Queue", {
-#         "VisibilityTimeout": 300
-#     })
+    template.has_resource_properties("AWS::SQS::Queue", {
+        "VisibilityTimeout": 180
+    })
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "BatchSize": 1,
+        "FunctionResponseTypes": ["ReportBatchItemFailures"]
+    })
+
+
+def test_catalog_prefix_is_not_public():
+    app = core.App()
+    stack = BookatalogStack(app, "bookatalog")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::S3::BucketPolicy", {
+        "PolicyDocument": {
+            "Statement": assertions.Match.array_with([
+                assertions.Match.object_like({
+                    "Sid": "DenyPublicCatalogRead",
+                    "Effect": "Deny",
+                    "Action": "s3:GetObject",
+                })
+            ])
+        }
+    })
@@ -0,0 +1,153 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+
+def read_manifest(s3, lambda_function):
+    return json.loads(s3.objects[lambda_function.CATALOG_MANIFEST_KEY]['Body'])
+
+
+def test_missing_manifest_is_rebuilt_from_listing(s3, lambda_function):
+    s3.add_object('files/2024/01/01/old.epub', b'a' * 10, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    s3.add_object('files/2024/02/01/new.pdf', b'b' * 20, datetime(2024, 2, 1, tzinfo=timezone.utc))
+
+    files = lambda_function.get_files_for_static_html()
+
+    assert [f['filename'] for f in files] == ['new.pdf', 'old.epub']
+    assert [f['size'] for f in files] == [20, 10]
+    assert lambda_function.CATALOG_MANIFEST_KEY in s3.objects
+
+
+def test_listings_read_manifest_without_listing(s3, lambda_function):
+    lambda_function.get_files_for_static_html()
+    lambda_function.listing_cache.clear()
+    s3.calls.clear()
+
+    lambda_function.get_recent_files_from_s3()
+    lambda_function.get_files_for_static_html()
+
+    assert s3.calls['list_objects_v2'] == 0
+    assert s3.calls['get_object'] == 1
+
+
+def test_upload_adds_entry_to_manifest(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'regenerate_static_index', lambda: None)
+    s3.add_object('files/2024/01/01/old.epub', b'a', datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+    lambda_function.upload_to_s3(b'x' * 42, 'files/2025/01/01/fresh.epub', 'fresh.epub')
+
+    manifest = read_manifest(s3, lambda_function)
+    assert [f['key'] for f in manifest['files']] == ['files/2025/01/01/fresh.epub', 'files/2024/01/01/old.epub']
+    assert manifest['files'][0]['size'] == 42
+    assert manifest['generation'] == 1
+
+
+def test_concurrent_manifest_update_is_retried(s3, lambda_function):
+    lambda_function.load_catalog_manifest()
+    original_put = s3.put_object
+    raced = []
+
+    def racing_put(**params):
+        # Another writer sneaks in right before our first conditional write
+        if not raced and params.get('IfMatch'):
+            raced.append(True)
+            manifest = json.loads(s3.objects[lambda_function.CATALOG_MANIFEST_KEY]['Body'])
+            manifest['files'].append({'key': 'files/other.epub', 'size': 1,
+                                      'last_modified': '2023-01-01T00:00:00.000000+00:00'})
+            original_put(Bucket='test-bucket', Key=lambda_function.CATALOG_MANIFEST_KEY,
+                         Body=json.dumps(manifest).encode('utf-8'))
+        return original_put(**params)
+
+    s3.put_object = racing_put
+    lambda_function.add_to_catalog_manifest({'key': 'files/mine.epub', 'size': 2,
+                                             'last_modified': '2024-01-01T00:00:00.000000+00:00'})
+
+    keys = [f['key'] for f in read_manifest(s3, lambda_function)['files']]
+    assert keys == ['files/mine.epub', 'files/other.epub']
+
+
+def test_corrupt_manifest_is_rebuilt_after_upload(s3, lambda_function):
+    s3.add_object(lambda_function.CATALOG_MANIFEST_KEY, b'not json')
+
+    result = lambda_function.upload_to_s3(b'x' * 5, 'files/2025/01/01/fresh.epub', 'fresh.epub')
+
+    assert result['key'] == 'files/2025/01/01/fresh.epub'
+    keys = [f['key'] for f in read_manifest(s3, lambda_function)['files']]
+    assert keys == ['files/2025/01/01/fresh.epub']
+
+
+def test_exhausted_manifest_retries_drop_the_manifest(s3, lambda_function, monkeypatch):
+    lambda_function.load_catalog_manifest()
+
+    def give_up(entry):
+        raise RuntimeError("Could not update catalog manifest: too many concurrent writers")
+
+    monkeypatch.setattr(lambda_function, 'add_to_catalog_manifest', give_up)
+    lambda_function.upload_to_s3(b'y' * 5, 'files/2025/01/01/lost.epub', 'lost.epub')
+
+    # The next read rebuilds the manifest from the listing, including the new file
+    keys = [f['key'] for f in read_manifest(s3, lambda_function)['files']]
+    assert keys == ['files/2025/01/01/lost.epub']
+
+
+def test_burst_of_30_concurrent_writers_keeps_every_entry(s3, lambda_function, monkeypatch):
+    lambda_function.load_catalog_manifest()
+    # Responses as slow as real S3, so writers keep acting on stale manifests
+    for name in ('get_object', 'put_object'):
+        def slow_call(_call=getattr(s3, name), **params):
+            response = _call(**params)
+            time.sleep(random.uniform(0.03, 0.04))
+            return response
+        monkeypatch.setattr(s3, name, slow_call)
+    barrier = threading.Barrier(30)
+
+    def add(n):
+        barrier.wait()
+        lambda_function.add_to_catalog_manifest({'key': f"files/burst{n:02d}.epub", 'size': n,
+                                                 'last_modified': f"2024-01-01T00:00:{n:02d}.000000+00:00"})
+
+    threads = [threading.Thread(target=add, args=(n,)) for n in range(30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    keys = [f['key'] for f in read_manifest(s3, lambda_function)['files']]
+    assert keys == [f"files/burst{n:02d}.epub" for n in range(29, -1, -1)]
+
+
+class FakeContext:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def test_manifest_retries_stop_before_the_invocation_runs_out(s3, lambda_function, monkeypatch):
+    lambda_function.load_catalog_manifest()
+    attempts = []
+
+    def always_conflicting(manifest, **params):
+        attempts.append(True)
+        raise lambda_function.ClientError(
+            {'Error': {'Code': 'PreconditionFailed'}, 'ResponseMetadata': {'HTTPStatusCode': 412}}, 'PutObject')
+
+    def upload_job(job):
+        lambda_function.upload_to_s3(b'z' * 5, 'files/2025/01/01/late.epub', 'late.epub')
+
+    monkeypatch.setattr(lambda_function, 'put_catalog_manifest', always_conflicting)
+    monkeypatch.setattr(lambda_function, 'process_ingest_job', upload_job)
+    monkeypatch.setattr(lambda_function, 'invocation_deadline', None)
+    # Half a second left once the reserve for the fallback is kept back
+    context = FakeContext((lambda_function.INVOCATION_RESERVE_SECONDS + 0.5) * 1000)
+    started = time.monotonic()
+
+    lambda_function.handle_ingest_records({'Records': [{'messageId': 'm1', 'body': '{}'}]}, context)
+
+    assert time.monotonic() - started < lambda_function.INVOCATION_RESERVE_SECONDS
+    assert len(attempts) > 1
+    # The writer gave up in time to drop the manifest for a rebuild
+    assert lambda_function.CATALOG_MANIFEST_KEY not in s3.objects
@@ -0,0 +1,69 @@
+import base64
+import gzip
+import time
+
+import pytest
+
+from tests.unit.builders import listing_request, make_files
+
+# Effective throughput of an e-reader on weak Wi-Fi
+SLOW_LINK_BYTES_PER_SECOND = 1_000_000 / 8
+
+
+def test_encoding_negotiation(lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'RESPONSE_ENCODINGS', ('br', 'gzip'))
+
+    assert lambda_function.negotiate_encoding('gzip, deflate, br') == 'br'
+    assert lambda_function.negotiate_encoding('gzip, deflate') == 'gzip'
+    assert lambda_function.negotiate_encoding('br;q=0, gzip;q=0.5') == 'gzip'
+    assert lambda_function.negotiate_encoding('*;q=0.1') == 'br'
+    assert lambda_function.negotiate_encoding('gzip;q=0') is None
+    assert lambda_function.negotiate_encoding('identity') is None
+    assert lambda_function.negotiate_encoding(None) is None
+
+
+def test_listing_is_gzipped_for_clients_that_accept_it(s3, lambda_function):
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/book.epub', 'book.epub')
+    plain = listing_request(lambda_function)
+
+    response = listing_request(lambda_function, {'accept-encoding': 'gzip, deflate'})
+
+    assert response['isBase64Encoded'] is True
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(base64.b64decode(response['body'])).decode('utf-8') == plain['body']
+    assert plain['isBase64Encoded'] is False and 'Content-Encoding' not in plain['headers']
+
+
+def test_static_pages_are_stored_gzipped(s3, lambda_function):
+    lambda_function.regenerate_static_index()
+
+    for key in ('index.html', 'error.html', lambda_function.CSS_ASSET_KEY):
+        assert s3.objects[key]['ContentEncoding'] == 'gzip'
+    assert 'No files uploaded yet' in s3.read_text('index.html')
+
+
+def test_uncompressed_page_is_replaced_by_gzipped_one(s3, lambda_function):
+    body = b'<html>same</html>'
+    lambda_function.publish_artifact('page/1.html', body, 'text/html', 'max-age=60', compress=False)
+
+    assert lambda_function.publish_artifact('page/1.html', body, 'text/html', 'max-age=60')
+    assert not lambda_function.publish_artifact('page/1.html', body, 'text/html', 'max-age=60')
+    assert s3.read_text('page/1.html') == '<html>same</html>'
+
+
+@pytest.mark.benchmark
+def test_benchmark_compressed_listing_sizes(lambda_function):
+    encodings = ['gzip'] + (['br'] if lambda_function.brotli else [])
+    for rows in (50, 1_000, 10_000):
+        html = lambda_function.generate_html_page(make_files(rows)).encode('utf-8')
+        report = [f"{rows} rows: identity {len(html) / 1024:.0f} KiB "
+                  f"({len(html) / SLOW_LINK_BYTES_PER_SECOND:.2f}s at 1 Mbit/s)"]
+        for encoding in encodings:
+            started = time.perf_counter()
+            body = lambda_function.compress_body(html, encoding)
+            elapsed = time.perf_counter() - started
+            report.append(f"{encoding} {len(body) / 1024:.0f} KiB in {elapsed * 1000:.0f} ms "
+                          f"({len(body) / SLOW_LINK_BYTES_PER_SECOND:.2f}s at 1 Mbit/s)")
+            assert len(body) < len(html) / 5
+        print(", ".join(report))
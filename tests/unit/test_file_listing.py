@@ -0,0 +1,111 @@
+import json
+
+from tests.unit.builders import listing_request
+
+
+def test_listing_returns_etag(s3, lambda_function):
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/book.epub', 'book.epub')
+
+    response = listing_request(lambda_function)
+
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'].startswith('"')
+    assert 'book.epub' in response['body']
+
+
+def test_unchanged_listing_returns_304(s3, lambda_function):
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/book.epub', 'book.epub')
+    etag = listing_request(lambda_function)['headers']['ETag']
+    s3.calls.clear()
+
+    response = listing_request(lambda_function, {'if-none-match': etag})
+
+    assert response['statusCode'] == 304
+    assert 'body' not in response
+    assert s3.calls['get_object'] == 0
+
+
+def test_upload_changes_etag(s3, lambda_function):
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/book.epub', 'book.epub')
+    etag = listing_request(lambda_function)['headers']['ETag']
+
+    lambda_function.upload_to_s3(b'y', 'files/2025/01/02/other.epub', 'other.epub')
+    response = listing_request(lambda_function, {'if-none-match': f'W/{etag}'})
+
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] != etag
+
+
+def test_etag_changes_before_presigned_links_expire(s3, lambda_function, monkeypatch):
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/book.epub', 'book.epub')
+    now = 1_700_000_000
+    monkeypatch.setattr(lambda_function.time, 'time', lambda: now)
+    etag = lambda_function.get_listing_etag('"manifest-v1"')
+
+    now += lambda_function.LISTING_ETAG_WINDOW
+
+    assert lambda_function.get_listing_etag('"manifest-v1"') != etag
+
+
+def test_warm_container_serves_listing_from_cache(s3, lambda_function):
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/book.epub', 'book.epub')
+    first = listing_request(lambda_function)
+    s3.calls.clear()
+
+    second = listing_request(lambda_function)
+
+    assert second['body'] == first['body']
+    assert sum(s3.calls.values()) == 0
+    assert lambda_function.listing_cache.hits >= 2
+
+
+def test_upload_invalidates_listing_cache(s3, lambda_function):
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/book.epub', 'book.epub')
+    listing_request(lambda_function)
+
+    lambda_function.upload_to_s3(b'y', 'files/2025/01/02/other.epub', 'other.epub')
+
+    assert 'other.epub' in listing_request(lambda_function)['body']
+
+
+def test_listing_cache_is_bounded(lambda_function):
+    cache = lambda_function.ListingCache(ttl=60, max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.get_or_compute(key, lambda: key)
+
+    assert list(cache.entries) == ['b', 'c']
+
+
+def test_listing_links_stylesheet_when_asset_url_is_configured(s3, lambda_function, monkeypatch):
+    inline = listing_request(lambda_function)['body']
+    monkeypatch.setattr(lambda_function, 'ASSET_BASE_URL', 'https://bucket.s3.eu-west-1.amazonaws.com')
+    lambda_function.listing_cache.clear()
+
+    linked = listing_request(lambda_function)['body']
+
+    css_key = lambda_function.CSS_ASSET_KEY
+    assert '<style>' in inline
+    assert f'href="https://bucket.s3.eu-west-1.amazonaws.com/{css_key}"' in linked
+    assert len(linked) < len(inline) - 1000
+    assert css_key in s3.objects
+
+
+def test_etag_matches_the_manifest_the_page_shows(s3, lambda_function):
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/book.epub', 'book.epub')
+    # The API caches the manifest in this container
+    lambda_function.handle_api_files({'queryStringParameters': {}}, None)
+    _, cached_manifest_etag = lambda_function.load_catalog_manifest()
+    # Another container uploads; this container's cache doesn't see it yet
+    manifest, manifest_etag = lambda_function.load_catalog_manifest()
+    manifest['files'].insert(0, {'key': 'files/2025/01/02/other.epub', 'size': 1,
+                                 'last_modified': '2025-01-02T00:00:00.000000+00:00'})
+    lambda_function.s3_client.put_object(Bucket='test-bucket', Key=lambda_function.CATALOG_MANIFEST_KEY,
+                                         Body=json.dumps(manifest).encode('utf-8'))
+
+    stale = listing_request(lambda_function)
+    lambda_function.listing_cache.clear()
+    fresh = listing_request(lambda_function, {'if-none-match': stale['headers']['ETag']})
+
+    assert stale['headers']['ETag'] == lambda_function.get_listing_etag(cached_manifest_etag)
+    assert 'other.epub' not in stale['body']
+    assert fresh['statusCode'] == 200 and 'other.epub' in fresh['body']
@@ -0,0 +1,190 @@
+import tracemalloc
+
+import pytest
+
+from tests.unit.builders import MIB
+from tests.unit.fake_download import FakeDownload
+
+
+class DiscardingS3:
+    """Accepts multipart uploads but keeps only the part sizes"""
+
+    def __init__(self):
+        self.part_sizes = []
+        self.completed = False
+
+    def create_multipart_upload(self, **params):
+        return {'UploadId': 'upload-1'}
+
+    def upload_part(self, Body, PartNumber, **params):
+        self.part_sizes.append(len(Body))
+        return {'ETag': f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, **params):
+        self.completed = True
+        return {'ETag': '"multipart"'}
+
+    def put_object(self, Key, **params):
+        # Only the content hash marker is expected outside the multipart upload
+        assert Key.startswith('catalog/sha256/')
+
+
+def test_streaming_upload_memory_is_bounded_by_part_size(lambda_function, monkeypatch):
+    fake = DiscardingS3()
+    monkeypatch.setattr(lambda_function, 's3_client', fake)
+    monkeypatch.setattr(lambda_function, 'UPLOAD_PART_SIZE', 5 * MIB)
+
+    tracemalloc.start()
+    result = lambda_function.stream_to_s3(FakeDownload(40 * MIB).iter_content(), 'files/big.pdf',
+                                        'application/pdf', {})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"streamed 40 MiB with 5 MiB parts, peak {peak / MIB:.1f} MiB")
+    assert result['size'] == 40 * MIB
+    assert fake.completed and sum(fake.part_sizes) == 40 * MIB
+    assert peak < 2 * 5 * MIB
+
+
+def test_large_file_is_assembled_from_parts(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'UPLOAD_PART_SIZE', 5 * MIB)
+    download = FakeDownload(12 * MIB)
+
+    lambda_function.upload_to_s3(download.iter_content(), 'files/big.pdf', 'big.pdf')
+
+    assert s3.objects['files/big.pdf']['Body'] == b''.join(FakeDownload(12 * MIB).iter_content())
+    assert s3.calls['upload_part'] == 3
+    assert s3.objects['files/big.pdf']['ContentType'] == 'application/pdf'
+
+
+def test_failed_stream_aborts_multipart_upload(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'UPLOAD_PART_SIZE', 5 * MIB)
+
+    with pytest.raises(IOError):
+        lambda_function.upload_to_s3(FakeDownload(12 * MIB, fail_after=6 * MIB).iter_content(),
+                                     'files/big.pdf', 'big.pdf')
+
+    assert s3.calls['abort_multipart_upload'] == 1
+    assert 'files/big.pdf' not in s3.objects
+
+
+def test_telegram_document_is_streamed_to_s3(s3, lambda_function, sent_messages, monkeypatch):
+    download = FakeDownload(300 * 1024)
+    monkeypatch.setattr(lambda_function, 'download_telegram_file', lambda file_id: download)
+    message = {'document': {'file_id': 'abc', 'file_name': 'book.epub', 'file_size': download.size}}
+
+    lambda_function.handle_file_upload(message, 42)
+
+    stored = [obj for key, obj in s3.objects.items() if key.endswith('/book.epub')]
+    assert len(stored) == 1 and len(stored[0]['Body']) == download.size
+    assert s3.calls['put_object'] >= 1 and s3.calls['create_multipart_upload'] == 0
+    assert download.closed
+    assert sent_messages == [(42, "✅ File 'book.epub' uploaded successfully!")]
+
+
+def test_url_download_without_content_length_is_capped(s3, lambda_function, sent_messages, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'UPLOAD_PART_SIZE', 5 * MIB)
+    download = FakeDownload(100 * MIB)
+    consumed = []
+    chunks = download.iter_content()
+    download.iter_content = lambda chunk_size=None: (consumed.append(len(c)) or c for c in chunks)
+    monkeypatch.setattr(lambda_function.requests, 'get', lambda url, **kwargs: download)
+
+    lambda_function.handle_url_download('http://example.com/huge.pdf', 42)
+
+    assert sent_messages[-1] == (42, "❌ File too large (max 20MB)")
+    assert sum(consumed) <= lambda_function.MAX_FILE_SIZE + download.chunk_size
+    assert s3.calls['abort_multipart_upload'] == 1
+    assert not any(key.endswith('huge.pdf') for key in s3.objects)
+    assert download.closed
+
+
+def test_url_download_is_streamed_to_s3(s3, lambda_function, sent_messages, monkeypatch):
+    download = FakeDownload(512 * 1024)
+    monkeypatch.setattr(lambda_function.requests, 'get', lambda url, **kwargs: download)
+
+    lambda_function.handle_url_download('http://example.com/book.epub', 42)
+
+    stored = [obj for key, obj in s3.objects.items() if key.endswith('/book.epub')]
+    assert len(stored) == 1 and len(stored[0]['Body']) == download.size
+    assert sent_messages[-1] == (42, "✅ File 'book.epub' downloaded and saved!")
+
+
+def test_duplicate_content_is_not_stored_again(s3, lambda_function, sent_messages):
+    lambda_function.upload_to_s3(b'same book', 'files/2025/01/01/book.epub', 'book.epub')
+    s3.puts.clear()
+
+    result = lambda_function.upload_to_s3(b'same book', 'files/2025/02/01/copy.epub', 'copy.epub')
+
+    assert result['duplicate_of'] == 'files/2025/01/01/book.epub'
+    assert 'files/2025/02/01/copy.epub' not in s3.objects
+    assert s3.puts['index.html'] == 0
+    assert s3.puts[lambda_function.CATALOG_MANIFEST_KEY] == 0
+
+
+def test_duplicate_large_file_aborts_multipart_upload(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'UPLOAD_PART_SIZE', 5 * MIB)
+    lambda_function.upload_to_s3(FakeDownload(12 * MIB).iter_content(), 'files/a/big.pdf', 'big.pdf')
+
+    result = lambda_function.upload_to_s3(FakeDownload(12 * MIB).iter_content(), 'files/b/big.pdf', 'big.pdf')
+
+    assert result['duplicate_of'] == 'files/a/big.pdf'
+    assert s3.calls['abort_multipart_upload'] == 1
+    assert 'files/b/big.pdf' not in s3.objects
+
+
+def test_duplicate_reply_points_to_existing_entry(s3, lambda_function, sent_messages, monkeypatch):
+    monkeypatch.setattr(lambda_function.requests, 'get', lambda url, **kwargs: FakeDownload(1024))
+    lambda_function.handle_url_download('http://example.com/book.epub', 42)
+    monkeypatch.setattr(lambda_function, 'download_telegram_file', lambda file_id: FakeDownload(1024))
+
+    lambda_function.handle_file_upload({'document': {'file_id': 'abc', 'file_name': 'same.epub', 'file_size': 1024}}, 42)
+
+    assert "already in the library as 'book.epub'" in sent_messages[-1][1]
+
+
+def test_hash_of_deleted_file_can_be_claimed_again(s3, lambda_function):
+    lambda_function.upload_to_s3(b'book', 'files/a/book.epub', 'book.epub')
+    s3.delete_object(Bucket='test-bucket', Key='files/a/book.epub')
+
+    result = lambda_function.upload_to_s3(b'book', 'files/b/book.epub', 'book.epub')
+
+    assert result['duplicate_of'] is None
+    assert 'files/b/book.epub' in s3.objects
+
+
+def test_content_still_uploading_counts_as_duplicate(s3, lambda_function):
+    content_hash = lambda_function.hashlib.sha256(b'book').hexdigest()
+    lambda_function.claim_content_hash(content_hash, 'files/a/book.epub')
+
+    assert lambda_function.claim_content_hash(content_hash, 'files/b/book.epub') == 'files/a/book.epub'
+
+
+def test_abandoned_pending_claim_can_be_taken_over(s3, lambda_function, monkeypatch):
+    content_hash = lambda_function.hashlib.sha256(b'book').hexdigest()
+    lambda_function.claim_content_hash(content_hash, 'files/a/book.epub')
+    monkeypatch.setattr(lambda_function, 'CONTENT_HASH_PENDING_SECONDS', 0)
+
+    assert lambda_function.claim_content_hash(content_hash, 'files/b/book.epub') is None
+
+
+def test_same_book_sent_again_under_same_name_is_duplicate(s3, lambda_function):
+    lambda_function.upload_to_s3(b'book', 'files/2024/01/01/x.epub', 'x.epub')
+    s3.puts.clear()
+
+    result = lambda_function.upload_to_s3(b'book', 'files/2024/01/01/x.epub', 'x.epub')
+
+    assert result['duplicate_of'] == 'files/2024/01/01/x.epub'
+    assert s3.puts['files/2024/01/01/x.epub'] == 0
+    assert s3.puts[lambda_function.CATALOG_MANIFEST_KEY] == 0
+
+
+def test_overwritten_key_no_longer_holds_its_hash(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'UPLOAD_PART_SIZE', 5 * MIB)
+    lambda_function.upload_to_s3(FakeDownload(6 * MIB).iter_content(), 'files/a/x.pdf', 'x.pdf')
+    lambda_function.upload_to_s3(FakeDownload(7 * MIB).iter_content(), 'files/a/x.pdf', 'x.pdf')
+
+    result = lambda_function.upload_to_s3(FakeDownload(6 * MIB).iter_content(), 'files/a/y.pdf', 'y.pdf')
+
+    assert result['duplicate_of'] is None
+    assert len(s3.objects['files/a/y.pdf']['Body']) == 6 * MIB
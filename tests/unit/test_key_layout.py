@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from tests.unit.builders import BASE_TIME
+
+
+def seed_dated_files(s3, lambda_function, count):
+    for i in range(count):
+        timestamp = BASE_TIME + timedelta(hours=i * 7 % count)
+        key = lambda_function.build_file_key(f"book{i:04d}.epub", timestamp, layout='dated')
+        s3.add_object(key, b'x' * i, timestamp)
+
+
+def test_recent_layout_keys_sort_newest_first(lambda_function):
+    older = lambda_function.build_file_key('a.epub', BASE_TIME, layout='recent')
+    newer = lambda_function.build_file_key('b.epub', BASE_TIME + timedelta(seconds=1), layout='recent')
+
+    assert newer < older
+    assert lambda_function.recent_key_timestamp(older) == BASE_TIME
+
+
+def test_recent_layout_lists_newest_with_one_call(s3, lambda_function, monkeypatch):
+    seed_dated_files(s3, lambda_function, 1200)
+    dated = [(f['filename'], f['size']) for f in (
+        lambda_function.manifest_entry_to_file(lambda_function.object_to_manifest_entry(obj))
+        for obj in lambda_function.list_recent_objects(50)
+    )]
+
+    monkeypatch.setattr(lambda_function, 'KEY_LAYOUT', 'recent')
+    result = lambda_function.migrate_to_recent_layout()
+    s3.calls.clear()
+    recent = lambda_function.list_recent_objects(50)
+
+    assert result == {'migrated': 1200, 'remaining': 0}
+    assert s3.calls['list_objects_v2'] == 1
+    assert [(obj['Key'].rsplit('/', 1)[1], obj['Size']) for obj in recent] == dated
+
+
+def test_migration_keeps_manifest_dates(s3, lambda_function, monkeypatch):
+    seed_dated_files(s3, lambda_function, 5)
+    before = [(f['filename'], f['last_modified']) for f in lambda_function.get_files_for_static_html()]
+
+    monkeypatch.setattr(lambda_function, 'KEY_LAYOUT', 'recent')
+    lambda_function.migrate_to_recent_layout()
+    after = lambda_function.get_files_for_static_html()
+
+    assert [(f['filename'], f['last_modified']) for f in after] == before
+    assert all(f['s3_key'].startswith(lambda_function.RECENT_PREFIX) for f in after)
+    assert not any(key.startswith('files/2024/') for key in s3.objects)
+
+
+def test_migration_is_skipped_for_dated_layout(s3, lambda_function):
+    seed_dated_files(s3, lambda_function, 3)
+
+    result = lambda_function.lambda_handler({'Action': 'migrate-key-layout'}, None)
+
+    assert result['migrated'] == 0
+    assert s3.calls['copy_object'] == 0
+
+
+def test_migration_keeps_duplicate_detection(s3, lambda_function, monkeypatch):
+    lambda_function.upload_to_s3(b'same book', 'files/2024/01/01/book.epub', 'book.epub')
+
+    monkeypatch.setattr(lambda_function, 'KEY_LAYOUT', 'recent')
+    lambda_function.migrate_to_recent_layout()
+    new_key = lambda_function.get_files_for_static_html()[0]['s3_key']
+    result = lambda_function.upload_to_s3(b'same book', 'files/2025/02/01/copy.epub', 'copy.epub')
+
+    assert new_key.startswith(lambda_function.RECENT_PREFIX)
+    assert result['duplicate_of'] == new_key
+
+
+def test_backfill_indexes_files_stored_before_deduplication(s3, lambda_function):
+    s3.add_object('files/2024/01/01/old.epub', b'old book', BASE_TIME)
+    s3.add_object('files/2024/01/02/copy.epub', b'old book', BASE_TIME + timedelta(days=1))
+
+    result = lambda_function.lambda_handler({'Action': 'backfill-content-hashes'}, None)
+    upload = lambda_function.upload_to_s3(b'old book', 'files/2025/01/01/again.epub', 'again.epub')
+
+    assert result['hashed'] == 2
+    assert len(result['duplicates']) == 1
+    assert upload['duplicate_of'] in ('files/2024/01/01/old.epub', 'files/2024/01/02/copy.epub')
+    manifest, _ = lambda_function.load_catalog_manifest()
+    assert all(entry.get('sha256') for entry in manifest['files'])
+
+
+def test_migration_republishes_static_site(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'STATIC_PAGE_SIZE', 2)
+    seed_dated_files(s3, lambda_function, 5)
+    lambda_function.regenerate_static_index()
+
+    monkeypatch.setattr(lambda_function, 'KEY_LAYOUT', 'recent')
+    lambda_function.migrate_to_recent_layout()
+
+    for key in ['index.html', 'page/1.html', 'page/2.html']:
+        html = s3.read_text(key)
+        assert 'files/2024/' not in html
+        assert lambda_function.RECENT_PREFIX in html
@@ -0,0 +1,99 @@
+import json
+import re
+import time
+
+import pytest
+
+from tests.unit.builders import api_request, seed_manifest
+
+
+@pytest.fixture
+def lazy(lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'LAZY_LISTING', True)
+    monkeypatch.setattr(lambda_function, 'LAZY_FIRST_SCREEN_ROWS', 5)
+    monkeypatch.setattr(lambda_function, 'STATIC_PAGE_SIZE', 10)
+
+
+def lazy_state(html):
+    return json.loads(re.search(r'var lazyListing = (.*?);</script>', html).group(1))
+
+
+def row_names(html):
+    return re.findall(r'download="([^"]+)"', html)
+
+
+def scroll_static_site(s3):
+    """Follow the static loader state the way the browser script does"""
+    index = s3.read_text('index.html')
+    names = row_names(index)
+    state = lazy_state(index)
+    skip = state['skip']
+    for page in range(state['pages'], 0, -1):
+        fragment = json.loads(s3.read_text(f"page/{page}.json"))
+        names.extend(record['name'] for record in fragment['files'][skip:])
+        skip = 0
+    return names
+
+
+@pytest.mark.parametrize('count', [33, 37])
+def test_static_scroll_shows_every_file_once(s3, lambda_function, lazy, count):
+    seed_manifest(s3, lambda_function, count)
+
+    lambda_function.regenerate_static_index()
+
+    index = s3.read_text('index.html')
+    assert len(row_names(index)) == max(5, count % 10)
+    assert scroll_static_site(s3) == [f"book{i:06d}.epub" for i in range(count - 1, -1, -1)]
+
+
+def test_upload_keeps_static_scroll_consistent(s3, lambda_function, lazy):
+    seed_manifest(s3, lambda_function, 29)
+    lambda_function.regenerate_static_index()
+
+    lambda_function.upload_to_s3(b'new', 'files/book999999.epub', 'book999999.epub')
+
+    names = scroll_static_site(s3)
+    assert names[0] == 'book999999.epub'
+    assert sorted(names) == sorted(set(names)) and len(names) == 30
+
+
+def test_static_index_weight_is_constant(s3, lambda_function, lazy):
+    seed_manifest(s3, lambda_function, 205)
+    lambda_function.regenerate_static_index()
+    small = s3.read_text('index.html')
+
+    seed_manifest(s3, lambda_function, 20_005)
+    lambda_function.regenerate_static_index()
+    large = s3.read_text('index.html')
+
+    assert len(row_names(small)) == len(row_names(large)) == 5
+    assert abs(len(large) - len(small)) < 64
+
+
+def test_dynamic_listing_continues_through_api(s3, lambda_function, lazy):
+    seed_manifest(s3, lambda_function, 12)
+    event = {'requestContext': {'http': {'method': 'GET'}}, 'rawPath': '/', 'headers': {}}
+
+    html = lambda_function.lambda_handler(event, None)['body']
+    names = row_names(html)
+    state = lazy_state(html)
+    while state['cursor']:
+        body = json.loads(api_request(lambda_function, links=1, limit=state['limit'], cursor=state['cursor'])['body'])
+        names.extend(record['name'] for record in body['files'])
+        state['cursor'] = body['next_cursor']
+
+    assert len(row_names(html)) == 5
+    assert names == [f"book{i:06d}.epub" for i in range(11, -1, -1)]
+
+
+@pytest.mark.benchmark
+def test_benchmark_first_render_at_100k_books(s3, lambda_function, lazy):
+    seed_manifest(s3, lambda_function, 100_000)
+    event = {'requestContext': {'http': {'method': 'GET'}}, 'rawPath': '/', 'headers': {}}
+
+    started = time.perf_counter()
+    html = lambda_function.lambda_handler(event, None)['body']
+    elapsed = time.perf_counter() - started
+
+    print(f"lazy first screen at 100k books: {elapsed * 1000:.0f} ms, {len(html.encode('utf-8')) / 1024:.1f} KiB")
+    assert len(row_names(html)) == 5
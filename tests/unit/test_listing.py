@@ -0,0 +1,89 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+
+from tests.unit.builders import BASE_TIME
+
+
+class SyntheticListing:
+    """Serves a large listing page by page without materialising it"""
+
+    def __init__(self, total, page_size=1000):
+        self.total = total
+        self.page_size = page_size
+        self.pages_served = 0
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        for start in range(0, self.total, self.page_size):
+            self.pages_served += 1
+            yield {'Contents': [
+                # Lexicographic key order is deliberately unrelated to recency
+                {'Key': f"{Prefix}{i:07d}.epub", 'Size': i,
+                 'LastModified': BASE_TIME + timedelta(seconds=(i * 7919) % self.total)}
+                for i in range(start, min(start + self.page_size, self.total))
+            ]}
+
+
+def test_recent_objects_follow_continuation_tokens(s3, lambda_function):
+    for i in range(2500):
+        # Newest objects sort last lexicographically, beyond the first page
+        s3.add_object(f"files/{i:05d}.epub", b'x', BASE_TIME + timedelta(minutes=i))
+
+    recent = lambda_function.list_recent_objects(20)
+
+    assert [obj['Key'] for obj in recent] == [f"files/{i:05d}.epub" for i in range(2499, 2479, -1)]
+    assert s3.calls['list_objects_v2'] == 3
+
+
+def test_manifest_rebuild_covers_all_pages(s3, lambda_function):
+    for i in range(1500):
+        s3.add_object(f"files/{i:05d}.epub", b'x', BASE_TIME + timedelta(minutes=i))
+
+    manifest, _ = lambda_function.load_catalog_manifest()
+
+    assert len(manifest['files']) == 1500
+    assert manifest['files'][0]['key'] == 'files/01499.epub'
+
+
+def test_listing_falls_back_to_top_k_when_manifest_is_corrupt(s3, lambda_function):
+    s3.add_object(lambda_function.CATALOG_MANIFEST_KEY, b'not json')
+    s3.add_object('files/a.epub', b'x', BASE_TIME)
+    s3.add_object('files/b.epub', b'x', BASE_TIME + timedelta(days=1))
+
+    files = lambda_function.get_files_for_static_html()
+
+    assert [f['filename'] for f in files] == ['b.epub', 'a.epub']
+
+
+@pytest.mark.benchmark
+def test_benchmark_top_k_over_500k_objects(lambda_function, monkeypatch):
+    listing = SyntheticListing(500_000)
+    monkeypatch.setattr(lambda_function, 's3_client', listing)
+
+    started = time.perf_counter()
+    recent = lambda_function.list_recent_objects(50)
+    elapsed = time.perf_counter() - started
+
+    print(f"top-50 of 500k objects: {elapsed:.2f}s")
+    assert listing.pages_served == 500
+    assert [obj['LastModified'] for obj in recent] == [
+        BASE_TIME + timedelta(seconds=500_000 - n) for n in range(1, 51)
+    ]
+
+
+def test_top_k_memory_is_bounded_by_k(lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 's3_client', SyntheticListing(100_000))
+
+    tracemalloc.start()
+    lambda_function.list_recent_objects(50)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"top-50 of 100k objects: peak {peak / 1024:.0f} KiB")
+    # Only the heap and a single page are ever held, never the full listing
+    assert peak < 2 * 1024 * 1024
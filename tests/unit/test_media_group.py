@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+
+from tests.unit.fake_download import FakeDownload
+
+
+def album_message(message_id, file_name, file_size):
+    return {
+        'message_id': message_id,
+        'media_group_id': '13579',
+        'chat': {'id': 42, 'username': 'reader'},
+        'from': {'id': 7, 'username': 'sender'},
+        'document': {'file_id': f"file-{message_id}", 'file_name': file_name, 'file_size': file_size},
+    }
+
+
+def test_album_is_ingested_once_with_one_confirmation(s3, lambda_function, sent_messages, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'MEDIA_GROUP_WAIT_SECONDS', 0.3)
+    sizes = {'file-101': 1000, 'file-102': 2000, 'file-103': 3000}
+    monkeypatch.setattr(lambda_function, 'download_telegram_file', lambda file_id: FakeDownload(sizes[file_id]))
+    album = [album_message(101, 'one.epub', 1000), album_message(102, 'two.pdf', 2000),
+             album_message(103, 'three.epub', 3000)]
+
+    # Telegram delivers album members as separate, near-simultaneous updates
+    threads = [threading.Thread(target=lambda_function.process_ingest_job, args=({'update': {'message': m}},))
+               for m in album]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = sorted(key.rsplit('/', 1)[-1] for key in s3.objects if key.startswith('files/'))
+    assert stored == ['one.epub', 'three.epub', 'two.pdf']
+    assert len(sent_messages) == 1
+    assert sent_messages[0][1].startswith('📥 Saved 3 of 3 files:')
+    assert s3.puts['index.html'] == 1
+    assert not [key for key in s3.objects
+                if key.startswith(lambda_function.MEDIA_GROUP_PREFIX) and key.endswith('.json')]
+
+
+def test_rejected_album_member_is_reported_in_summary(s3, lambda_function, sent_messages, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'MEDIA_GROUP_WAIT_SECONDS', 0)
+    monkeypatch.setattr(lambda_function, 'download_telegram_file', lambda file_id: FakeDownload(500))
+    lambda_function.process_ingest_job({'update': {'message': album_message(201, 'notes.txt', 10)}})
+
+    assert sent_messages == [(42, "📥 Saved 0 of 1 files:\n❌ notes.txt: Only EPUB and PDF files allowed")]
+    assert s3.puts['index.html'] == 0
+
+
+def test_member_parked_during_ingest_is_picked_up(s3, lambda_function, sent_messages, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'MEDIA_GROUP_WAIT_SECONDS', 0.3)
+
+    def slow_download(file_id):
+        if file_id == 'file-2':
+            time.sleep(1)
+        return FakeDownload(100 if file_id == 'file-1' else 200)
+
+    monkeypatch.setattr(lambda_function, 'download_telegram_file', slow_download)
+    newest = threading.Thread(target=lambda_function.process_ingest_job,
+                              args=({'update': {'message': album_message(2, 'b.epub', 200)}},))
+    newest.start()
+    # The older member arrives after the newest one has listed the group
+    time.sleep(0.4)
+    lambda_function.process_ingest_job({'update': {'message': album_message(1, 'a.epub', 100)}})
+    newest.join()
+
+    stored = sorted(key.rsplit('/', 1)[-1] for key in s3.objects if key.startswith('files/'))
+    assert stored == ['a.epub', 'b.epub']
+    assert len(sent_messages) == 2
+    assert not [key for key in s3.objects
+                if key.startswith(lambda_function.MEDIA_GROUP_PREFIX) and key.endswith('.json')]
+
+
+def test_parked_member_keeps_only_what_ingest_needs(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'MEDIA_GROUP_WAIT_SECONDS', 0)
+    monkeypatch.setattr(lambda_function, 'ingest_document_batch', lambda documents, chat_id: None)
+    parked = []
+    original_put = s3.put_object
+
+    def recording_put(**params):
+        if params['Key'].startswith(lambda_function.MEDIA_GROUP_PREFIX) and params['Key'].endswith('.json'):
+            parked.append(json.loads(params['Body']))
+        return original_put(**params)
+
+    monkeypatch.setattr(s3, 'put_object', recording_put)
+    lambda_function.process_ingest_job({'update': {'message': album_message(301, 'book.epub', 10)}})
+
+    assert parked == [{'message_id': 301, 'document': album_message(301, 'book.epub', 10)['document']}]
@@ -0,0 +1,114 @@
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tests.unit.builders import MIB
+
+
+class ThrottledFileServer:
+    """Serves one file over HTTP, throttling every connection to a fixed rate"""
+
+    def __init__(self, body, bytes_per_second, ranges=True):
+        self.body = body
+        self.bytes_per_second = bytes_per_second
+        self.ranges = ranges
+        self.range_requests = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/big-book.pdf"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        served = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = served.body
+                match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+                if served.ranges and match:
+                    served.range_requests += 1
+                    start, end = int(match.group(1)), int(match.group(2))
+                    body = body[start:end + 1]
+                    self.send_response(206)
+                    self.send_header('Content-Range', f"bytes {start}-{end}/{len(served.body)}")
+                else:
+                    self.send_response(200)
+                if served.ranges:
+                    self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    for offset in range(0, len(body), 64 * 1024):
+                        chunk = body[offset:offset + 64 * 1024]
+                        self.wfile.write(chunk)
+                        time.sleep(len(chunk) / served.bytes_per_second)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+
+@pytest.fixture
+def small_parts(lambda_function, monkeypatch):
+    # Keep the benchmark quick: 1 MiB ranges/parts (the fake S3 has no 5 MiB minimum)
+    monkeypatch.setattr(lambda_function, 'UPLOAD_PART_SIZE', MIB)
+
+
+def stored_body(s3, name):
+    return next(obj['Body'] for key, obj in s3.objects.items() if key.endswith('/' + name))
+
+
+def test_ranged_download_matches_source(s3, lambda_function, small_parts):
+    body = os.urandom(3 * MIB + 12345)
+    with ThrottledFileServer(body, 64 * MIB) as server:
+        lambda_function.download_url_to_s3(server.url)
+
+    assert stored_body(s3, 'big-book.pdf') == body
+    assert server.range_requests == 4
+    assert s3.calls['upload_part'] == 4
+
+
+def test_falls_back_to_single_stream_without_range_support(s3, lambda_function, small_parts):
+    body = os.urandom(3 * MIB)
+    with ThrottledFileServer(body, 64 * MIB, ranges=False) as server:
+        lambda_function.download_url_to_s3(server.url)
+
+    assert stored_body(s3, 'big-book.pdf') == body
+    assert server.range_requests == 0
+
+
+@pytest.mark.benchmark
+def test_benchmark_ranged_download_on_throttled_server(s3, lambda_function, small_parts, monkeypatch):
+    body = os.urandom(4 * MIB)
+
+    with ThrottledFileServer(body, 4 * MIB, ranges=False) as server:
+        started = time.perf_counter()
+        lambda_function.download_url_to_s3(server.url)
+        single_elapsed = time.perf_counter() - started
+
+    s3.objects.clear()
+    monkeypatch.setattr(lambda_function, 'claim_content_hash', lambda content_hash, s3_key: None)
+    with ThrottledFileServer(body, 4 * MIB) as server:
+        started = time.perf_counter()
+        lambda_function.download_url_to_s3(server.url)
+        ranged_elapsed = time.perf_counter() - started
+
+    print(f"4 MiB at 4 MiB/s per connection: single stream {single_elapsed:.2f}s, "
+          f"{lambda_function.RANGED_DOWNLOAD_WORKERS} ranged connections {ranged_elapsed:.2f}s")
+    assert stored_body(s3, 'big-book.pdf') == body
@@ -0,0 +1,76 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+
+from tests.unit import legacy_render
+from tests.unit.builders import BASE_TIME, make_files
+
+
+def varied_files(count):
+    return [{'filename': f"Книга <{i}> & co.epub", 'size': i * 37_003, 's3_key': f"files/2024/01/01/{i}.epub",
+             'last_modified': BASE_TIME + timedelta(minutes=i * 61, seconds=i, microseconds=i),
+             'download_url': f"https://example.com/{i}?X-Amz-Signature=abc&n={i}"}
+            for i in range(count)]
+
+
+def comparable_lines(html):
+    """Page lines without the markup added since (the lazy-loading tbody id and
+    the empty search, navigation and loader slots)"""
+    return [line for line in html.replace('<tbody id="file-rows">', '<tbody>').splitlines() if line.strip()]
+
+
+def measure(render):
+    started = time.perf_counter()
+    html = render()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return html, elapsed, peak
+
+
+def test_template_is_compiled_into_chunks_and_slots(lambda_function):
+    compiled = lambda_function.compile_template("<p>{greeting}, {name}!</p>")
+
+    assert compiled == [('<p>', 'greeting'), (', ', 'name'), ('!</p>', None)]
+    assert ''.join(lambda_function.render_template(compiled, {'greeting': 'Hi', 'name': ['A', 'B']})) == '<p>Hi, AB!</p>'
+
+
+def test_page_renders_rows_and_stats(lambda_function):
+    html = lambda_function.generate_static_html_page(make_files(3), total_count=10, total_size=3 * 1024 * 1024)
+
+    assert html.count('<tr>') == 4  # header row plus three files
+    assert 'href="files/2024/01/01/Книга 2.epub"' in html
+    assert '<div class="stat-number">10</div>' in html
+    assert '<div class="stat-number">3.0</div>' in html
+
+
+@pytest.mark.parametrize('use_static_links', [False, True])
+@pytest.mark.parametrize('count', [0, 1, 200])
+def test_page_matches_legacy_renderer(lambda_function, use_static_links, count):
+    files = varied_files(count)
+
+    legacy = legacy_render.generate_html_page_template(files, use_static_links=use_static_links)
+    html = lambda_function.generate_html_page_template(files, use_static_links=use_static_links)
+
+    assert ''.join(lambda_function.generate_file_rows(files, use_static_links)) == \
+        legacy_render.generate_file_rows(files, use_static_links)
+    assert comparable_lines(html) == comparable_lines(legacy)
+
+
+@pytest.mark.benchmark
+def test_benchmark_render_100k_rows(lambda_function):
+    files = make_files(100_000)
+
+    legacy_html, legacy_elapsed, legacy_peak = measure(
+        lambda: legacy_render.generate_html_page_template(files, use_static_links=True))
+    html, elapsed, peak = measure(
+        lambda: lambda_function.generate_html_page_template(files, use_static_links=True))
+
+    print(f"100k rows: legacy {legacy_elapsed:.2f}s peak {legacy_peak / 2**20:.0f} MiB, "
+          f"compiled template {elapsed:.2f}s peak {peak / 2**20:.0f} MiB")
+    assert comparable_lines(html) == comparable_lines(legacy_html)
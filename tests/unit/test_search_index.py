@@ -0,0 +1,85 @@
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+
+def read_shard(s3, lambda_function, prefix):
+    return json.loads(s3.read_text(lambda_function.search_shard_key(prefix)))
+
+
+def test_tokens_are_normalized(lambda_function):
+    tokens = lambda_function.search_tokens('files/2024/01/01/Толстой Лёв - Война_и_мир (т.1).epub')
+
+    assert tokens == ['воина', 'лев', 'мир', 'толстои']
+    assert lambda_function.search_tokens('files/recent/1/Café Crème.pdf') == ['cafe', 'creme']
+
+
+def test_regenerate_publishes_sharded_index(s3, lambda_function):
+    s3.add_object('files/2024/01/01/War and Peace.epub', b'a' * 10, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    s3.add_object('files/2024/01/02/Warlock.pdf', b'b' * 20, datetime(2024, 1, 2, tzinfo=timezone.utc))
+
+    lambda_function.regenerate_static_index()
+
+    shard = read_shard(s3, lambda_function, 'wa')
+    assert shard['docs'] == [['files/2024/01/02/Warlock.pdf', 20], ['files/2024/01/01/War and Peace.epub', 10]]
+    assert shard['tokens'] == {'warlock': [0], 'war': [1]}
+    assert read_shard(s3, lambda_function, 'pe')['tokens'] == {'peace': [0]}
+    assert s3.objects[lambda_function.search_shard_key('wa')]['ContentEncoding'] == 'gzip'
+    assert 'id="search"' in s3.read_text('index.html')
+
+
+def test_upload_updates_only_its_shards(s3, lambda_function):
+    s3.add_object('files/2024/01/01/War and Peace.epub', b'a', datetime(2024, 1, 1, tzinfo=timezone.utc))
+    lambda_function.regenerate_static_index()
+    s3.puts.clear()
+
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/Warm Bodies.epub', 'Warm Bodies.epub')
+
+    assert sorted(k for k in s3.puts if k.startswith('search/') and s3.puts[k]) == ['search/bo.json', 'search/wa.json']
+    assert read_shard(s3, lambda_function, 'wa')['tokens'] == {'war': [0], 'warm': [1]}
+
+
+def test_concurrent_uploads_keep_every_entry(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'regenerate_static_index', lambda: None)
+    monkeypatch.setattr(lambda_function, 'publish_static_site_debounced', lambda manifest, etag: None)
+    barrier = threading.Barrier(8)
+
+    def upload(n):
+        barrier.wait()
+        lambda_function.upload_to_s3(f"book {n}".encode(), f"files/2025/01/01/Poems {n}.epub", f"Poems {n}.epub")
+
+    threads = [threading.Thread(target=upload, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(read_shard(s3, lambda_function, 'po')['docs']) == 8
+
+
+@pytest.mark.benchmark
+def test_benchmark_search_index_for_100k_books(lambda_function):
+    rng = random.Random(7)
+    syllables = [c + v for c in 'бвгджзклмнпрстфхцчшщ' for v in 'аеёиоуыэюя']
+    syllables += [c + v for c in 'bcdfghjklmnprstvwz' for v in 'aeiouy']
+    # A long tail of invented author and title words plus a few very common ones
+    words = [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(20_000)]
+    words += ['и', 'the', 'of', 'война', 'мир', 'история', 'тайна', 'king', 'dragon', 'том']
+    entries = [{'key': f"files/recent/{n:013d}/{' '.join(rng.choice(words) for _ in range(rng.randint(2, 6)))}.epub",
+                'size': 1000 + n} for n in range(100_000)]
+
+    started = time.perf_counter()
+    shards = lambda_function.build_search_shards(entries)
+    encoded = {prefix: gzip.compress(lambda_function.encode_search_shard(shard)) for prefix, shard in shards.items()}
+    elapsed = time.perf_counter() - started
+
+    sizes = sorted(len(body) for body in encoded.values())
+    print(f"search index for 100k books: {elapsed:.2f}s, {len(sizes)} shards, "
+          f"median {sizes[len(sizes) // 2] / 1024:.1f} KiB, largest {sizes[-1] / 1024:.0f} KiB gzipped, "
+          f"total {sum(sizes) / 2**20:.1f} MiB")
+    assert sizes[-1] < 256 * 1024
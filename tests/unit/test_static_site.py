@@ -0,0 +1,151 @@
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+
+def test_upload_updates_index_without_listing(s3, lambda_function):
+    s3.add_object('files/2024/01/01/old.epub', b'a', datetime(2024, 1, 1, tzinfo=timezone.utc))
+    lambda_function.regenerate_static_index()
+    s3.calls.clear()
+    s3.puts.clear()
+
+    lambda_function.upload_to_s3(b'x' * 10, 'files/2025/01/01/fresh.epub', 'fresh.epub')
+
+    assert s3.calls['list_objects_v2'] == 0
+    assert s3.calls['get_object'] == 2  # the manifest and the search shard for "fresh"
+    assert s3.puts['index.html'] == 1
+    assert s3.puts['error.html'] == 0
+    index = s3.read_text('index.html')
+    assert index.index('fresh.epub') < index.index('old.epub')
+
+
+def test_regenerate_publishes_index_and_error_page(s3, lambda_function):
+    lambda_function.regenerate_static_index()
+
+    assert 'No files uploaded yet' in s3.read_text('index.html')
+    assert 'error.html' in s3.objects
+
+
+def test_concurrent_upload_burst_publishes_index_once(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'INDEX_DEBOUNCE_SECONDS', 0.5)
+    barrier = threading.Barrier(10)
+
+    def upload(n):
+        barrier.wait()
+        lambda_function.upload_to_s3(f"book {n}".encode(), f"files/2025/01/01/book{n}.epub", f"book{n}.epub")
+
+    threads = [threading.Thread(target=upload, args=(n,)) for n in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert s3.puts['index.html'] == 1
+    index = s3.read_text('index.html')
+    assert all(f"book{n}.epub" in index for n in range(10))
+
+
+def test_unchanged_artifacts_are_not_rewritten(s3, lambda_function):
+    lambda_function.regenerate_static_index()
+    s3.puts.clear()
+
+    lambda_function.regenerate_static_index()
+
+    assert s3.puts['index.html'] == 0
+    assert s3.puts['error.html'] == 0
+
+
+def test_changed_index_is_rewritten(s3, lambda_function):
+    lambda_function.regenerate_static_index()
+    s3.puts.clear()
+
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/new.epub', 'new.epub')
+
+    assert s3.puts['index.html'] == 1
+    assert s3.objects['index.html']['Metadata']['content-sha256']
+
+
+def test_regenerate_publishes_full_archive_pages(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'STATIC_PAGE_SIZE', 10)
+    monkeypatch.setattr(lambda_function, 'STATIC_INDEX_LIMIT', 5)
+    for i in range(25):
+        s3.add_object(f"files/book{i:02d}.epub", b'x', datetime(2024, 1, 1 + i, tzinfo=timezone.utc))
+
+    lambda_function.regenerate_static_index()
+
+    assert sorted(k for k in s3.objects if k.startswith('page/')) == ['page/1.html', 'page/2.html']
+    oldest = s3.read_text('page/1.html')
+    assert 'href="../files/book00.epub"' in oldest and 'book10.epub' not in oldest
+    index = s3.read_text('index.html')
+    assert 'href="page/2.html"' in index
+    assert '<div class="stat-number">25</div>' in index
+
+
+def test_older_books_link_skips_pages_shown_on_index(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'STATIC_PAGE_SIZE', 10)
+    monkeypatch.setattr(lambda_function, 'STATIC_INDEX_LIMIT', 10)
+    for i in range(25):
+        s3.add_object(f"files/book{i:02d}.epub", b'x', datetime(2024, 1, 1 + i, tzinfo=timezone.utc))
+
+    lambda_function.regenerate_static_index()
+
+    index = s3.read_text('index.html')
+    # The five unpaged files plus the whole of page 2, then page 1 continues
+    assert 'href="page/1.html"' in index and 'href="page/2.html"' not in index
+    shown = set(re.findall(r'href="files/book(\d\d)', index))
+    older = set(re.findall(r'href="../files/book(\d\d)', s3.read_text('page/1.html')))
+    assert not shown & older
+    assert sorted(shown | older) == [f"{i:02d}" for i in range(25)]
+
+
+def test_regenerate_command_reports_whole_catalog(s3, lambda_function, sent_messages):
+    for i in range(60):
+        s3.add_object(f"files/book{i:02d}.epub", b'x' * 1024, datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=i))
+
+    lambda_function.handle_regenerate_command(42)
+
+    assert '• Files indexed: 60' in sent_messages[-1][1]
+
+
+def test_upload_only_writes_archive_page_when_it_fills(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'STATIC_PAGE_SIZE', 10)
+    for i in range(19):
+        s3.add_object(f"files/book{i:02d}.epub", b'x', datetime(2024, 1, 1 + i, tzinfo=timezone.utc))
+    lambda_function.regenerate_static_index()
+    s3.puts.clear()
+
+    lambda_function.upload_to_s3(b'19', 'files/book19.epub', 'book19.epub')
+    lambda_function.upload_to_s3(b'20', 'files/book20.epub', 'book20.epub')
+
+    assert s3.puts['page/2.html'] == 1
+    assert s3.puts['page/1.html'] == 0
+    assert s3.puts['index.html'] == 2
+
+
+def test_pages_link_the_fingerprinted_stylesheet(s3, lambda_function, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'STATIC_PAGE_SIZE', 2)
+    for n in range(3):
+        s3.add_object(f"files/2024/01/0{n + 1}/book{n}.epub", bytes([n]), datetime(2024, 1, n + 1, tzinfo=timezone.utc))
+
+    lambda_function.regenerate_static_index()
+
+    css_key = lambda_function.CSS_ASSET_KEY
+    assert css_key.startswith('assets/app.') and css_key.endswith('.css')
+    assert s3.objects[css_key]['CacheControl'] == 'public, max-age=31536000, immutable'
+    assert s3.objects[css_key]['ContentType'] == 'text/css; charset=utf-8'
+    index = s3.read_text('index.html')
+    assert f'<link rel="stylesheet" href="{css_key}">' in index
+    assert '<style>' not in index
+    assert f'href="../{css_key}"' in s3.read_text('page/1.html')
+
+
+def test_stylesheet_is_written_only_once(s3, lambda_function):
+    lambda_function.regenerate_static_index()
+    # A cold container finds the asset already in place
+    lambda_function.published_assets.clear()
+
+    lambda_function.upload_to_s3(b'x', 'files/2025/01/01/fresh.epub', 'fresh.epub')
+    lambda_function.upload_to_s3(b'y', 'files/2025/01/01/other.epub', 'other.epub')
+
+    assert s3.puts[lambda_function.CSS_ASSET_KEY] == 1
+    assert lambda_function.CSS_ASSET_KEY in lambda_function.published_assets
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+import requests
+
+from tests.unit.fake_telegram import FakeBotApi
+
+
+@pytest.fixture
+def bot_api(lambda_function, monkeypatch):
+    with FakeBotApi() as api:
+        monkeypatch.setattr(lambda_function, 'TELEGRAM_API_BASE', api.url)
+        monkeypatch.setattr(lambda_function, 'telegram_session', lambda_function.create_telegram_session())
+        yield api
+
+
+def test_telegram_calls_reuse_one_connection(lambda_function, bot_api):
+    for n in range(20):
+        lambda_function.send_telegram_message(42, f"message {n}")
+
+    assert len(bot_api.method_calls('sendMessage')) == 20
+    assert bot_api.connections == 1
+
+
+@pytest.mark.benchmark
+def test_benchmark_pooled_session_against_fresh_connections(lambda_function, bot_api):
+    url = f"{bot_api.url}/bottest-token/sendMessage"
+
+    started = time.perf_counter()
+    for n in range(50):
+        requests.post(url, json={'chat_id': 42, 'text': 'fresh'}, timeout=10).raise_for_status()
+    fresh_elapsed = time.perf_counter() - started
+    fresh_connections = bot_api.connections
+
+    started = time.perf_counter()
+    for n in range(50):
+        lambda_function.send_telegram_message(42, 'pooled')
+    pooled_elapsed = time.perf_counter() - started
+
+    print(f"50 sendMessage calls: fresh connections {fresh_elapsed * 1000:.0f} ms "
+          f"({fresh_connections} connections), pooled {pooled_elapsed * 1000:.0f} ms "
+          f"({bot_api.connections - fresh_connections} connection)")
+    assert fresh_connections == 50
+    assert bot_api.connections - fresh_connections == 1
+
+
+def test_webhook_registration_uses_the_session(lambda_function, bot_api):
+    assert lambda_function.set_telegram_webhook('https://example.com/hook') == {'success': True, 'error': None}
+    assert bot_api.method_calls('setWebhook') == [{'url': 'https://example.com/hook'}]
+
+
+def test_local_mode_reads_file_from_disk(s3, lambda_function, bot_api, monkeypatch, tmp_path):
+    monkeypatch.setattr(lambda_function, 'TELEGRAM_LOCAL_MODE', True)
+    monkeypatch.setattr(lambda_function, 'TELEGRAM_MAX_FILE_SIZE', 2000 * 1024 * 1024)
+    book = tmp_path / 'documents' / 'file_7.epub'
+    book.parent.mkdir()
+    book.write_bytes(b'e' * (21 * 1024 * 1024))
+    bot_api.file_paths['big'] = str(book)
+
+    result = lambda_function.ingest_telegram_document(
+        {'file_id': 'big', 'file_name': 'big.epub', 'file_size': 21 * 1024 * 1024}, publish=False)
+
+    # Larger than the cloud limit, and never fetched over HTTP
+    assert result['size'] == 21 * 1024 * 1024
+    assert s3.objects[result['key']]['Body'] == book.read_bytes()
+    assert bot_api.method_calls('getFile') == [{'file_id': 'big'}]
+
+
+def test_local_mode_falls_back_to_http_when_path_is_not_mounted(lambda_function, bot_api, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'TELEGRAM_LOCAL_MODE', True)
+    bot_api.file_paths['remote'] = '/var/lib/telegram-bot-api/documents/file_8.pdf'
+    bot_api.files['var/lib/telegram-bot-api/documents/file_8.pdf'] = b'%PDF-remote'
+
+    with lambda_function.download_telegram_file('remote') as response:
+        assert b''.join(response.iter_content(1024)) == b'%PDF-remote'
@@ -0,0 +1,75 @@
+import threading
+
+from tests.unit.fake_download import FakeDownload
+
+
+def text_message(text, entities=None):
+    message = {'chat': {'id': 42}, 'text': text}
+    if entities is not None:
+        message['entities'] = entities
+    return message
+
+
+def test_extract_urls_uses_entities_with_utf16_offsets(lambda_function):
+    text = "📚 Books: http://a.example/one.epub and more"
+    entities = [
+        {'type': 'url', 'offset': 10, 'length': 25},
+        {'type': 'text_link', 'offset': 40, 'length': 4, 'url': 'https://b.example/two.pdf'},
+    ]
+
+    urls = lambda_function.extract_urls(text_message(text, entities))
+
+    assert urls == ['http://a.example/one.epub', 'https://b.example/two.pdf']
+
+
+def test_extract_urls_scans_text_without_entities(lambda_function):
+    text = "http://a.example/one.epub\nhttp://a.example/two.pdf, http://a.example/one.epub"
+
+    assert lambda_function.extract_urls(text_message(text)) == [
+        'http://a.example/one.epub', 'http://a.example/two.pdf'
+    ]
+
+
+def test_batch_downloads_concurrently_and_replies_once(s3, lambda_function, sent_messages, monkeypatch):
+    urls = [f"http://mirror.example/book{n}.epub" for n in range(6)] + ['http://mirror.example/page.html']
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_get(url, **kwargs):
+        with lock:
+            active.append(url)
+            peak.append(len(active))
+        download = FakeDownload(1024 + urls.index(url))
+        if url.endswith('book3.epub'):
+            download.headers['content-length'] = str(lambda_function.MAX_FILE_SIZE + 1)
+        original_close = download.close
+
+        def close():
+            with lock:
+                active.remove(url)
+            original_close()
+        download.close = close
+        return download
+
+    monkeypatch.setattr(lambda_function.requests, 'get', fake_get)
+
+    lambda_function.handle_text_message(text_message("\n".join(urls)), 42)
+
+    stored = sorted(key.rsplit('/', 1)[1] for key in s3.objects if key.startswith('files/'))
+    assert stored == ['book0.epub', 'book1.epub', 'book2.epub', 'book4.epub', 'book5.epub']
+    assert s3.puts['index.html'] == 1
+    assert len(sent_messages) == 2
+    summary = sent_messages[-1][1]
+    assert summary.startswith("📥 Saved 5 of 7 links")
+    assert "❌ book3.epub: file too large" in summary
+    assert "⏭️ http://mirror.example/page.html" in summary
+    assert max(peak) <= lambda_function.URL_DOWNLOAD_WORKERS
+
+
+def test_single_url_keeps_single_reply_flow(s3, lambda_function, sent_messages, monkeypatch):
+    monkeypatch.setattr(lambda_function.requests, 'get', lambda url, **kwargs: FakeDownload(100))
+
+    lambda_function.handle_text_message(text_message("http://mirror.example/book.epub"), 42)
+
+    assert sent_messages[-1] == (42, "✅ File 'book.epub' downloaded and saved!")
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+
+class CollectingQueue:
+    """In-process ingestion queue that holds jobs until the test drains them"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, job):
+        self.jobs.append(json.loads(json.dumps(job)))
+
+    def as_sqs_event(self):
+        records = [{'messageId': str(n), 'eventSource': 'aws:sqs', 'body': json.dumps(job)}
+                   for n, job in enumerate(self.jobs)]
+        self.jobs = []
+        return {'Records': records}
+
+
+@pytest.fixture
+def queue(lambda_function, monkeypatch):
+    collecting = CollectingQueue()
+    monkeypatch.setattr(lambda_function, 'ingest_queue', collecting)
+    return collecting
+
+
+def webhook_request(lambda_function, update):
+    event = {'requestContext': {'http': {'method': 'POST'}}, 'body': json.dumps(update)}
+    return lambda_function.lambda_handler(event, None)
+
+
+def document_update(update_id, file_name='book.epub'):
+    return {'update_id': update_id, 'message': {
+        'message_id': update_id, 'chat': {'id': 42},
+        'document': {'file_id': f"file-{update_id}", 'file_name': file_name, 'file_size': 10},
+    }}
+
+
+def test_webhook_enqueues_without_downloading(s3, lambda_function, queue, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'download_telegram_file',
+                        lambda file_id: pytest.fail("webhook must not download"))
+
+    response = webhook_request(lambda_function, document_update(1))
+
+    assert response == {'statusCode': 200, 'body': 'OK'}
+    assert [job['update']['update_id'] for job in queue.jobs] == [1]
+
+
+def test_worker_processes_queued_updates(s3, lambda_function, queue, sent_messages, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'download_telegram_file', lambda file_id: None)
+    webhook_request(lambda_function, document_update(1))
+
+    result = lambda_function.lambda_handler(queue.as_sqs_event(), None)
+
+    assert result == {'batchItemFailures': []}
+    assert sent_messages == [(42, "❌ Failed to download file")]
+
+
+def test_worker_reports_failed_records(s3, lambda_function, queue, monkeypatch):
+    def broken(message, chat_id):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(lambda_function, 'handle_file_upload', broken)
+    webhook_request(lambda_function, document_update(1))
+
+    result = lambda_function.lambda_handler(queue.as_sqs_event(), None)
+
+    assert result == {'batchItemFailures': [{'itemIdentifier': '0'}]}
+
+
+def test_updates_without_messages_are_not_queued(lambda_function, queue):
+    webhook_request(lambda_function, {'update_id': 1, 'edited_message': {}})
+
+    assert queue.jobs == []
+
+
+def test_redelivered_update_is_ignored(s3, lambda_function, queue):
+    webhook_request(lambda_function, document_update(7))
+    webhook_request(lambda_function, document_update(7))
+
+    assert [job['update']['update_id'] for job in queue.jobs] == [7]
+    assert s3.calls['put_object'] == 1
+
+
+def test_redelivery_to_another_container_is_ignored(s3, lambda_function, queue):
+    webhook_request(lambda_function, document_update(7))
+    lambda_function.processed_updates.clear()
+
+    response = webhook_request(lambda_function, document_update(7))
+
+    assert response['statusCode'] == 200
+    assert len(queue.jobs) == 1
+
+
+def test_update_is_released_when_enqueue_fails(s3, lambda_function, queue, monkeypatch):
+    enqueue = queue.enqueue
+
+    def unavailable(job):
+        raise RuntimeError("queue unavailable")
+    queue.enqueue = unavailable
+    assert webhook_request(lambda_function, document_update(7))['statusCode'] == 500
+
+    queue.enqueue = enqueue
+    webhook_request(lambda_function, document_update(7))
+
+    assert len(queue.jobs) == 1